@@ -1,141 +1,242 @@
+import argparse
+import logging
 import pygame
 import random
-from collections import deque
+import time
+import zlib
+
+from TagPathfinding import BlockField, CooperativePlanner, DistanceField, UNREACHABLE
+from TagRenderer import GridRenderer
+from TagWorld import CellType, Direction, Grid, SpatialHash, NEIGHBOR_DIRECTIONS, generate_walls
 
 CELL_SIZE = 40
 GRID_WIDTH = 10
 GRID_HEIGHT = 10
-SCREEN_WIDTH = CELL_SIZE * GRID_WIDTH
-SCREEN_HEIGHT = CELL_SIZE * GRID_HEIGHT
-FPS = 10
-
-class CellType:
-    EMPTY = 0
-    WALL = 1
-    PLAYER = 2
-    BOT = 3
-
-class Direction:
-    UP = (0, -1)
-    DOWN = (0, 1)
-    LEFT = (-1, 0)
-    RIGHT = (1, 0)
-
-class Cell:
-    def __init__(self, row, col, cell_type):
-        self.row = row
-        self.col = col
-        self.cell_type = cell_type
+MAX_SCREEN_SIZE = 1000
+FPS = 60
+
+# The simulation advances in fixed ticks regardless of the frame rate; the
+# player steps every PLAYER_MOVE_TICKS and bots every BOT_MOVE_TICKS, which
+# matches the old 10 FPS player and 250 ms bot timer.
+TICK_RATE = 20
+TICK_MS = 1000 / TICK_RATE
+PLAYER_MOVE_TICKS = 2
+BOT_MOVE_TICKS = 5
+MAX_TICKS_PER_FRAME = 10
+
+LOG_LEVEL = logging.INFO
+logger = logging.getLogger("AGameofTag")
+
+BOT_COUNT = 2
+MIN_SPAWN_DISTANCE = 5
+# Random spawn picks give up after this many misses and choose from a list
+# of every cell that fits, which also catches maps with no room left.
+MAX_SPAWN_ATTEMPTS = 1000
+WALL_DENSITY = 0.2
+# Maps larger than this only search CHASE_RADIUS steps around the player;
+# bots further out follow a coarse field over FIELD_BLOCK_SIZE blocks until
+# they are in range.
+FULL_FIELD_CELLS = 256 * 256
+CHASE_RADIUS = 64
+FIELD_BLOCK_SIZE = 16
+# Bots plan PLAN_HORIZON steps ahead together; any still unplanned after
+# PLAN_BUDGET_MS fall back to following the distance field on their own.
+PLAN_HORIZON = 8
+PLAN_BUDGET_MS = 10
+
+CLASSIC_WALLS = {
+    (0,7),
+    (1,1), (1,2), (1,6), (1,9),
+    (2,2), (2,5),
+    (3,0), (3,7),
+    (4,2), (4,3), (4,4), (4,7), (4,9),
+    (5,1), (5,2), (5,4),
+    (6,4), (6,8),
+    (7,4), (7,8),
+    (8,1), (8,8)
+}
 
 class Game:
-    def __init__(self):
-        self.grid = [[Cell(row, col, CellType.EMPTY) for col in range(GRID_WIDTH)] for row in range(GRID_HEIGHT)]
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, bot_count=BOT_COUNT, seed=None, procedural=None,
+                 plan_budget_ms=PLAN_BUDGET_MS):
+        self.rng = random.Random(seed)
+        self.grid = Grid(width, height)
+        self.entities = SpatialHash()
         self.player_position = (0, 0)
-        self.bot_positions = [(0, 0)]
-        self.generate_level()
-        self.last_bot_move_time = pygame.time.get_ticks()
-
-
-    def generate_level(self):
-        walls = [
-            (0,7),
-            (1,1), (1,2), (1,6), (1,9),
-            (2,2), (2,5),
-            (3,0), (3,7),
-            (4,2), (4,3), (4,4), (4,7), (4,9),
-            (5,1), (5,2), (5,4),
-            (6,4), (6,8),
-            (7,4), (7,8),
-            (8,1), (8,8)
-        ]
-
-        for row in range(len(self.grid)):
-            for col in range(len(self.grid[0])):
-                if (row, col) in walls:
-                    self.grid[row][col].cell_type = CellType.WALL
-                
+        self.bot_positions = []
+        self.tick = 0
+        self.player_input = None
+        if procedural is None:
+            procedural = (width, height) != (GRID_WIDTH, GRID_HEIGHT)
+        max_distance = None if width * height <= FULL_FIELD_CELLS else CHASE_RADIUS
+        self.distance_field = DistanceField(width, height, self.grid.cells, max_distance)
+        self.block_field = None
+        self.planner = CooperativePlanner(width, height, PLAN_HORIZON, plan_budget_ms)
+        self.player_adjacent_bots = 0
+        self.generate_level(bot_count, procedural)
+        if max_distance is not None:
+            self.block_field = BlockField(width, height, self.grid.cells, FIELD_BLOCK_SIZE)
+        self.previous_player_position = self.player_position
+        self.previous_bot_positions = list(self.bot_positions)
+
+    def generate_level(self, bot_count=BOT_COUNT, procedural=False):
+        if procedural:
+            generate_walls(self.grid, self.rng, WALL_DENSITY)
+        else:
+            for row, col in CLASSIC_WALLS:
+                self.grid.set_cell((col, row), CellType.WALL)
+
         self.player_position = self.get_random_empty_position()
-        self.grid[self.player_position[1]][self.player_position[0]].cell_type = CellType.PLAYER
+        self.entities.add(self.player_position, CellType.PLAYER)
 
         self.bot_positions = []
-        for _ in range(2):
-            bot_position = self.get_random_empty_position()
-            while self.calculate_distance(self.player_position, bot_position) < 5:
-                bot_position = self.get_random_empty_position()
+        for _ in range(bot_count):
+            bot_position = self.get_random_empty_position(MIN_SPAWN_DISTANCE)
             self.bot_positions.append(bot_position)
-            self.grid[bot_position[1]][bot_position[0]].cell_type = CellType.BOT
+            self.entities.add(bot_position, CellType.BOT)
 
     def calculate_distance(self, position1, position2):
         return abs(position1[0] - position2[0]) + abs(position1[1] - position2[1])
 
 
-    def get_random_empty_position(self):
-        while True:
-            row = random.randint(0, len(self.grid) - 1)
-            col = random.randint(0, len(self.grid[0]) - 1)
-            if self.grid[row][col].cell_type == CellType.EMPTY:
+    def get_random_empty_position(self, min_distance=0):
+        for _ in range(MAX_SPAWN_ATTEMPTS):
+            row = self.rng.randint(0, self.grid.height - 1)
+            col = self.rng.randint(0, self.grid.width - 1)
+            if self.is_spawn_position((col, row), min_distance):
                 return (col, row)
+        candidates = [(col, row) for row in range(self.grid.height) for col in range(self.grid.width)
+                      if self.is_spawn_position((col, row), min_distance)]
+        if not candidates:
+            raise ValueError(f"no free cell left at least {min_distance} steps from the player; "
+                             f"use fewer bots or a larger map")
+        return self.rng.choice(candidates)
+
+    def is_spawn_position(self, position, min_distance):
+        return self.is_empty_position(position) and self.calculate_distance(self.player_position, position) >= min_distance
 
     def is_valid_position(self, position):
-        col, row = position
-        return 0 <= row < len(self.grid) and 0 <= col < len(self.grid[0])
+        return self.grid.is_valid(position)
 
     def is_empty_position(self, position):
-        col, row = position
-        return self.is_valid_position(position) and self.grid[row][col].cell_type == CellType.EMPTY
+        return self.grid.is_valid(position) and not self.grid.is_wall(position) and not self.entities.is_occupied(position)
+
+    def count_adjacent_bots(self, position):
+        count = 0
+        for direction in NEIGHBOR_DIRECTIONS:
+            if self.entities.occupant((position[0] + direction[0], position[1] + direction[1])) == CellType.BOT:
+                count += 1
+        return count
+
+    def is_player_caught(self):
+        return self.count_adjacent_bots(self.player_position) > 0
 
     def move_player(self, direction):
         new_position = (self.player_position[0] + direction[0], self.player_position[1] + direction[1])
         if self.is_empty_position(new_position):
-            self.grid[self.player_position[1]][self.player_position[0]].cell_type = CellType.EMPTY
+            self.entities.move(self.player_position, new_position)
             self.player_position = new_position
-            self.grid[self.player_position[1]][self.player_position[0]].cell_type = CellType.PLAYER
+
+    def step(self):
+        # Advances the world by exactly one tick. Nothing here reads the
+        # clock, so a seed plus the sequence of player inputs fully
+        # determines the game. Returns True once the player is caught.
+        self.previous_player_position = self.player_position
+        self.previous_bot_positions = list(self.bot_positions)
+        self.tick += 1
+        if self.player_input is not None and self.tick % PLAYER_MOVE_TICKS == 0:
+            self.move_player(self.player_input)
+        if self.tick % BOT_MOVE_TICKS == 0:
+            self.move_bots()
+        return self.is_player_caught()
 
     def move_bots(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_bot_move_time >= 250: 
-            for i, bot_position in enumerate(self.bot_positions):
-                bot_direction = self.get_bot_direction(bot_position)
-                new_position = (bot_position[0] + bot_direction[0], bot_position[1] + bot_direction[1])
-                if self.is_empty_position(new_position):
-                    self.grid[bot_position[1]][bot_position[0]].cell_type = CellType.EMPTY
+        self.distance_field.update(self.player_position)
+        if self.block_field is not None:
+            self.block_field.update(self.player_position)
+        self.player_adjacent_bots = self.count_adjacent_bots(self.player_position)
+        if self.player_adjacent_bots:
+            logger.debug("Player is adjacent to a bot. Bots are waiting.")
+            return
+
+        width = self.grid.width
+        starts = [row * width + col for col, row in self.bot_positions]
+        steps = self.planner.plan(starts, self.distance_field.distances, (self.grid.index(self.player_position),))
+        logger.debug("Tick %d: planned %d/%d bots in %.2f ms (%d states expanded)", self.tick,
+                     self.planner.last_planned, len(starts), self.planner.last_plan_ms, self.planner.last_expanded)
+
+        # Planned moves never collide, but a bot may be stepping into a cell
+        # another bot is only now leaving, so keep applying the moves whose
+        # target is free until nothing changes.
+        pending = []
+        unplanned = []
+        for i, step in enumerate(steps):
+            if step is None:
+                unplanned.append(i)
+            elif step != starts[i]:
+                row, col = divmod(step, width)
+                pending.append((i, (col, row)))
+        while pending:
+            waiting = []
+            for i, new_position in pending:
+                if self.entities.is_occupied(new_position):
+                    waiting.append((i, new_position))
+                else:
+                    self.entities.move(self.bot_positions[i], new_position)
                     self.bot_positions[i] = new_position
-                    self.grid[new_position[1]][new_position[0]].cell_type = CellType.BOT
-            self.last_bot_move_time = current_time 
-
-            for bot_position in self.bot_positions:
-                if bot_position == self.player_position:
-                    print("Game Over - Player caught by a bot!")
-                    return True 
+            if len(waiting) == len(pending):
+                break
+            pending = waiting
+
+        for i in unplanned:
+            bot_position = self.bot_positions[i]
+            bot_direction = self.get_bot_direction(bot_position)
+            new_position = (bot_position[0] + bot_direction[0], bot_position[1] + bot_direction[1])
+            if bot_direction != (0, 0) and not self.is_empty_position(new_position) and self.is_far_bot(bot_position):
+                # Far bots have nothing better to go on, so rather than
+                # stand at a wall or behind another bot they slide along
+                # the other axis towards the player.
+                bot_direction = self.get_slide_direction(bot_position, bot_direction)
+                new_position = (bot_position[0] + bot_direction[0], bot_position[1] + bot_direction[1])
+            if self.is_empty_position(new_position):
+                self.entities.move(bot_position, new_position)
+                self.bot_positions[i] = new_position
+                if self.calculate_distance(new_position, self.player_position) == 1:
+                    self.player_adjacent_bots += 1
 
-        return False 
+    def checksum(self):
+        return zlib.crc32(repr((self.tick, self.player_position, self.bot_positions)).encode())
 
     def get_bot_direction(self, bot_position):
         if self.calculate_distance(bot_position, self.player_position) == 1:
-            print("Player is adjacent to bot. Moving towards player.")
+            logger.debug("Bot at %s is adjacent to the player. Moving towards player.", bot_position)
             return self.get_direction_towards_bot(bot_position, self.player_position)
         else:
-            for bot_pos in self.bot_positions:
-                if self.calculate_distance(bot_pos, self.player_position) == 1:
-                    print("Player is adjacent to another bot. Waiting.")
-                    return (0, 0) 
-
-            print("Player is not adjacent to bot. Using BFS.")
-            visited = {}
-            queue = deque([(bot_position, 0, None)]) 
-            while queue:
-                current_position, distance, previous_position = queue.popleft()
-                if current_position == self.player_position:
-                    while previous_position != bot_position:
-                        current_position = previous_position
-                        previous_position = visited[current_position][1] 
-                    return self.get_direction_towards_bot(bot_position, current_position)
-                visited[current_position] = (distance, previous_position)  
-                for direction in [Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT]:
-                    new_position = (current_position[0] + direction[0], current_position[1] + direction[1])
-                    if self.is_valid_position(new_position) and new_position not in visited and self.grid[new_position[1]][new_position[0]].cell_type != CellType.WALL:
-                        queue.append((new_position, distance + 1, current_position))
-            return (0, 0) 
+            if self.player_adjacent_bots:
+                logger.debug("Bot at %s: player is adjacent to another bot. Waiting.", bot_position)
+                return (0, 0) 
+
+            if self.is_far_bot(bot_position):
+                logger.debug("Bot at %s is out of range and following the block field.", bot_position)
+                bot_direction = self.block_field.step_towards_target(bot_position)
+                if bot_direction == (0, 0):
+                    bot_direction = self.get_direction_towards_bot(bot_position, self.player_position)
+                return bot_direction
+
+            logger.debug("Bot at %s is following the distance field.", bot_position)
+            return self.distance_field.step_towards_target(bot_position)
+
+    def is_far_bot(self, bot_position):
+        return self.block_field is not None and self.distance_field.distance(bot_position) == UNREACHABLE
+
+    def get_slide_direction(self, bot_position, blocked_direction):
+        # A bot already level with the player on the other axis picks a
+        # side by its own position, so bots queued behind each other split.
+        dx = self.player_position[0] - bot_position[0]
+        dy = self.player_position[1] - bot_position[1]
+        if blocked_direction[0]:
+            return (0, 1 if dy > 0 or dy == 0 and bot_position[1] % 2 else -1)
+        return (1 if dx > 0 or dx == 0 and bot_position[0] % 2 else -1, 0)
 
     def get_direction_towards_bot(self, bot_position, player_position):
         dx = player_position[0] - bot_position[0]
@@ -145,56 +246,103 @@ class Game:
         else:
             return (0, 1 if dy > 0 else -1)
 
-    def draw(self, screen):
-        for row in range(len(self.grid)):
-            for col in range(len(self.grid[0])):
-                cell = self.grid[row][col]
-                if cell.cell_type == CellType.WALL:
-                    pygame.draw.rect(screen, (100, 100, 100), (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-                elif cell.cell_type == CellType.PLAYER:
-                    pygame.draw.rect(screen, (0, 255, 0), (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-                elif cell.cell_type == CellType.BOT:
-                    pygame.draw.rect(screen, (255, 0, 0), (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-                else:
-                    pygame.draw.rect(screen, (255, 255, 255), (col * CELL_SIZE, row * CELL_SIZE, CELL_SIZE, CELL_SIZE))
-        pygame.display.flip()
+def read_player_input():
+    keys = pygame.key.get_pressed()
+    if keys[pygame.K_w]:
+        return Direction.UP
+    elif keys[pygame.K_s]:
+        return Direction.DOWN
+    elif keys[pygame.K_a]:
+        return Direction.LEFT
+    elif keys[pygame.K_d]:
+        return Direction.RIGHT
+    return None
+
+def run_headless(ticks, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT, bot_count=BOT_COUNT,
+                 plan_budget_ms=None):
+    # Steps the simulation as fast as it will go with a seeded random-walk
+    # player, for balancing runs and reproducibility checks. Planning is
+    # unlimited unless a budget is passed: a run where the budget cuts a
+    # plan short depends on how fast the machine is.
+    game = Game(width, height, bot_count, seed, plan_budget_ms=plan_budget_ms)
+    input_rng = random.Random(seed)
+    start = time.perf_counter()
+    while game.tick < ticks:
+        if game.tick % PLAYER_MOVE_TICKS == 0:
+            game.player_input = input_rng.choice(NEIGHBOR_DIRECTIONS)
+        if game.step():
+            logger.info("Player caught by a bot at tick %d.", game.tick)
+            break
+    elapsed = time.perf_counter() - start
+    logger.info("%d ticks in %.2f s (%.0f ticks/s, %.1fx real time), state checksum %08x",
+                game.tick, elapsed, game.tick / max(elapsed, 1e-9),
+                game.tick * TICK_MS / 1000 / max(elapsed, 1e-9), game.checksum())
+    planner = game.planner
+    if planner.plan_count:
+        logger.info("Planning %d bots: %.2f ms/tick mean, %.2f ms max, budget hit on %d of %d ticks",
+                    bot_count, planner.total_plan_ms / planner.plan_count, planner.max_plan_ms,
+                    planner.cut_short, planner.plan_count)
+    return game
 
 def main():
+    parser = argparse.ArgumentParser(description="Pygame Pursuit Square")
+    parser.add_argument('--headless', action='store_true', help="run the simulation without a window")
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--bots', type=int, default=BOT_COUNT)
+    parser.add_argument('--plan-budget-ms', type=float, default=None,
+                        help=f"per-tick bot planning budget, 0 for unlimited "
+                             f"(default {PLAN_BUDGET_MS:g} in a window, unlimited headless)")
+    parser.add_argument('--log-level', default=logging.getLevelName(LOG_LEVEL))
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+
+    if args.headless:
+        try:
+            run_headless(args.ticks, args.seed, args.width, args.height, args.bots, args.plan_budget_ms or None)
+        except ValueError as error:
+            parser.error(str(error))
+        return
+
+    if args.plan_budget_ms is None:
+        args.plan_budget_ms = PLAN_BUDGET_MS
+    try:
+        game = Game(args.width, args.height, args.bots, args.seed, plan_budget_ms=args.plan_budget_ms or None)
+    except ValueError as error:
+        parser.error(str(error))
+
     pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    cell_size = max(1, min(CELL_SIZE, MAX_SCREEN_SIZE // max(args.width, args.height)))
+    screen = pygame.display.set_mode((cell_size * args.width, cell_size * args.height))
     pygame.display.set_caption("Pygame Pursuit Square")
     clock = pygame.time.Clock()
 
-    game = Game()
+    renderer = GridRenderer(game.grid, cell_size)
+    accumulator = 0.0
 
     running = True
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_w]:
-            game.move_player(Direction.UP)
-        elif keys[pygame.K_s]:
-            game.move_player(Direction.DOWN)
-        elif keys[pygame.K_a]:
-            game.move_player(Direction.LEFT)
-        elif keys[pygame.K_d]:
-            game.move_player(Direction.RIGHT)
-
-        game.move_bots()
-
-        for bot_position in game.bot_positions:
-            if game.calculate_distance(bot_position, game.player_position) == 1:
-                print("Game Over - Player caught by a bot!")
+            elif event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
+
+        game.player_input = read_player_input()
+
+        # Run however many fixed ticks the elapsed time calls for, capped so
+        # a long stall cannot snowball into ever longer catch-up frames.
+        accumulator = min(accumulator + clock.tick(FPS), MAX_TICKS_PER_FRAME * TICK_MS)
+        while accumulator >= TICK_MS:
+            accumulator -= TICK_MS
+            if game.step():
+                logger.info("Game Over - Player caught by a bot!")
                 running = False
                 break
 
-        screen.fill((255, 255, 255))
-        game.draw(screen)
-
-        clock.tick(FPS)
+        renderer.draw(screen, game, accumulator / TICK_MS)
 
     pygame.quit()
 
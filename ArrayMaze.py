@@ -1,7 +1,14 @@
 
+import argparse
 import pygame
 import sys
 
+import MazeGenerator
+from MazeFile import MazeFile
+from MazeSolver import MazeGrid
+import MazeView
+from MazeView import Camera, MazeRenderer
+
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GREEN = (0, 255, 0)
@@ -10,9 +17,19 @@ RED = (255, 0, 0)
 
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 900
-
-ROWS = 21
-COLS = 20
+TILE_SIZE = 40
+FPS = 60
+
+# Holding a key moves once, then again every KEY_REPEAT_INTERVAL_MS after
+# KEY_REPEAT_DELAY_MS, using pygame's own KEYDOWN repeat.
+KEY_REPEAT_DELAY_MS = 200
+KEY_REPEAT_INTERVAL_MS = 80
+KEY_DIRECTIONS = {
+    pygame.K_UP: (-1, 0),
+    pygame.K_DOWN: (1, 0),
+    pygame.K_LEFT: (0, -1),
+    pygame.K_RIGHT: (0, 1),
+}
 
 maze = [
     ['S', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#'],
@@ -38,65 +55,88 @@ maze = [
     ['#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#', '#']
 ]
 
-player_row, player_col = 0, 0
-for i in range(ROWS):
-    for j in range(COLS):
-        if maze[i][j] == 'S':
-            player_row = i
-            player_col = j
+parser = argparse.ArgumentParser(description="Maze Game")
+parser.add_argument('--maze', help="play a packed maze file")
+parser.add_argument('--generate', choices=sorted(MazeGenerator.GENERATORS), help="play a freshly generated maze")
+parser.add_argument('--width', type=int, default=41)
+parser.add_argument('--height', type=int, default=41)
+parser.add_argument('--seed', type=int, default=None)
+parser.add_argument('--repeat-delay', type=int, default=KEY_REPEAT_DELAY_MS, help="ms before a held key repeats")
+parser.add_argument('--repeat-interval', type=int, default=KEY_REPEAT_INTERVAL_MS, help="ms between repeats, 0 for none")
+args = parser.parse_args()
+
+# Any level works as long as it has width, height, start, exit and
+# is_open(); a MazeFile stays on disk and is read through a memory map.
+if args.maze:
+    level = MazeFile(args.maze)
+elif args.generate:
+    level = MazeGenerator.generate(args.width, args.height, args.generate, args.seed)
+else:
+    level = MazeGrid.from_rows(maze)
+
+player_row, player_col = level.start
 
 pygame.init()
 
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Maze Game")
+if args.repeat_interval > 0:
+    pygame.key.set_repeat(args.repeat_delay, args.repeat_interval)
+clock = pygame.time.Clock()
 
 font = pygame.font.Font(None, 36)
 
+renderer = MazeRenderer(level, TILE_SIZE, {MazeView.FLOOR: BLACK, MazeView.WALL: WHITE,
+                                           MazeView.START: GREEN, MazeView.EXIT: RED})
+camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, *renderer.world_size)
+
 def draw_maze():
-    for i in range(ROWS):
-        for j in range(COLS):
-            cell = maze[i][j]
-            if cell == '#':
-                pygame.draw.rect(screen, WHITE, (j * 40, i * 40, 40, 40))
-            elif cell == 'S':
-                pygame.draw.rect(screen, GREEN, (j * 40, i * 40, 40, 40))
-            elif cell == 'E':
-                pygame.draw.rect(screen, RED, (j * 40, i * 40, 40, 40))
-            else:
-                pass
+    camera.follow(player_col * TILE_SIZE + TILE_SIZE // 2, player_row * TILE_SIZE + TILE_SIZE // 2)
+    renderer.draw(screen, camera)
 
 def move_player(new_row, new_col):
     global player_row, player_col
-    if 0 <= new_row < ROWS and 0 <= new_col < COLS and maze[new_row][new_col] != '#':
+    if level.is_open((new_row, new_col)):
         player_row = new_row
         player_col = new_col
+        return True
+    return False
 
 running = True
+needs_redraw = True
 while running:
-    for event in pygame.event.get():
+    # Nothing moves on its own, so with no redraw pending the loop sleeps in
+    # event.wait() until there is input instead of spinning. Every queued
+    # key press is applied before the next frame is drawn.
+    events = pygame.event.get()
+    if not events and not needs_redraw:
+        events = [pygame.event.wait()]
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
-
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_UP]:
-        move_player(player_row - 1, player_col)
-    elif keys[pygame.K_LEFT]:
-        move_player(player_row, player_col - 1) 
-    elif keys[pygame.K_DOWN]:
-        move_player(player_row + 1, player_col) 
-    elif keys[pygame.K_RIGHT]:
-        move_player(player_row, player_col + 1) 
-
-    if maze[player_row][player_col] == 'E':
+        elif event.type == pygame.KEYDOWN and event.key in KEY_DIRECTIONS:
+            d_row, d_col = KEY_DIRECTIONS[event.key]
+            if move_player(player_row + d_row, player_col + d_col):
+                needs_redraw = True
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            needs_redraw = True
+
+    if (player_row, player_col) == level.exit:
         print("Congratulations! You reached the end!")
         running = False
 
-    screen.fill(BLACK)
-    draw_maze()
-    pygame.draw.rect(screen, BLUE, (player_col * 40, player_row * 40, 40, 40)) 
-    pygame.display.flip()
+    if needs_redraw and running:
+        screen.fill(BLACK)
+        draw_maze()
+        pygame.draw.rect(screen, BLUE, (*camera.to_screen(player_col * TILE_SIZE, player_row * TILE_SIZE), TILE_SIZE, TILE_SIZE))
+        pygame.display.flip()
+        needs_redraw = False
 
-    pygame.time.delay(100)
+    # Caps the frame rate while keys are repeating; costs nothing when idle
+    # because the wait above already blocked.
+    clock.tick(FPS)
 
+if isinstance(level, MazeFile):
+    level.close()
 pygame.quit()
 sys.exit()
\ No newline at end of file
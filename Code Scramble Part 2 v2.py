@@ -1,5 +1,9 @@
+import argparse
+
 import pygame
-import random
+
+from CodeScrambleSequence import NodeSequence
+from TextCache import TextCache
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -10,95 +14,27 @@ BLUE = (173, 216, 230)
 WIDTH = 50
 HEIGHT = 50
 MARGIN = 5
-
-class Node:
-    def __init__(self, data):
-        self.data = data
-        self.next = None
-
-def create_linked_list(sequence):
-    head = None
-    tail = None
-
-    for data in sequence:
-        new_node = Node(data)
-
-        if head is None:
-            head = tail = new_node
-        else:
-            tail.next = new_node
-            tail = new_node
-
-    return head
-
-def shuffle_linked_list(head):
-    nodes = []
-    current = head
-    while current:
-        nodes.append(current)
-        current = current.next
-
-    random.shuffle(nodes)
-
-    for i in range(len(nodes) - 1):
-        nodes[i].next = nodes[i + 1]
-    nodes[-1].next = None
-
-    return nodes[0]
-
-def display_linked_list(screen, head, bracket1, bracket2):
-    font = pygame.font.SysFont(None, 24)
-    current = head
-    x = MARGIN
-    y = MARGIN
-    index = 0
-    while current:
+FONT_SIZE = 24
+MAX_VISIBLE = 14
+
+def first_visible(sequence, bracket1):
+    # Long sequences scroll so the brackets stay near the middle of the
+    # window.
+    visible = min(len(sequence), MAX_VISIBLE)
+    return max(0, min(bracket1 - visible // 2, len(sequence) - visible))
+
+def display_linked_list(screen, sequence, bracket1, bracket2, text_cache):
+    first = first_visible(sequence, bracket1)
+    for index in range(first, min(first + MAX_VISIBLE, len(sequence))):
+        x = (MARGIN + WIDTH) * (index - first)
         if index == bracket1 or index == bracket2:
-            pygame.draw.rect(screen, BLUE, [(MARGIN + WIDTH) * index, MARGIN, WIDTH, HEIGHT])
+            pygame.draw.rect(screen, BLUE, [x, MARGIN, WIDTH, HEIGHT])
         else:
-            pygame.draw.rect(screen, GRAY, [(MARGIN + WIDTH) * index, MARGIN, WIDTH, HEIGHT])
-
-        text = font.render(str(current.data), True, BLACK)
-        screen.blit(text, (x + 15, y + 15))
-        x += WIDTH + MARGIN
-
-        current = current.next
-        index += 1
-
-def is_sorted(head):
-    while head and head.next:
-        if head.data > head.next.data:
-            return False
-        head = head.next
-    return True
-
-def swap_nodes(head, index1, index2):
-    if index1 == index2:
-        return head
-
-    prevX, currX = None, head
-    for _ in range(index1):
-        prevX, currX = currX, currX.next
+            pygame.draw.rect(screen, GRAY, [x, MARGIN, WIDTH, HEIGHT])
 
-    prevY, currY = None, head
-    for _ in range(index2):
-        prevY, currY = currY, currY.next
+        text_cache.blit(screen, str(sequence[index]), FONT_SIZE, BLACK, (x + WIDTH // 2, MARGIN + HEIGHT // 2))
 
-    if prevX:
-        prevX.next = currY
-    else:
-        head = currY
-
-    if prevY:
-        prevY.next = currX
-    else:
-        head = currX
-
-    currX.next, currY.next = currY.next, currX.next
-
-    return head
-
-def play_game(screen, head):
+def play_game(screen, sequence):
     selectedIndex1 = 0
     selectedIndex2 = 1
     bracket1 = 0
@@ -107,11 +43,12 @@ def play_game(screen, head):
 
     pygame.init()
     screen.fill(WHITE)
-    font = pygame.font.SysFont(None, 24)
+    text_cache = TextCache()
     clock = pygame.time.Clock()
 
     print("Welcome to the Sequence Arrangement Puzzle!")
     print("You need to rearrange the scrambled sequence to unlock the door.")
+    print("It can be done in", sequence.inversions, "swaps.")
 
     running = True
     while running:
@@ -119,10 +56,10 @@ def play_game(screen, head):
             if event.type == pygame.QUIT:
                 running = False
 
-        if not is_sorted(head):
+        if not sequence.is_sorted():
             if printSequence:
                 screen.fill(WHITE)
-                display_linked_list(screen, head, bracket1, bracket2)
+                display_linked_list(screen, sequence, bracket1, bracket2, text_cache)
                 pygame.display.flip()
                 printSequence = False
 
@@ -135,22 +72,22 @@ def play_game(screen, head):
                     selectedIndex2 -= 1
                     printSequence = True
             elif keys[pygame.K_d]:
-                if bracket2 < 3:
+                if bracket2 < len(sequence) - 1:
                     bracket1 += 1
                     bracket2 += 1
                     selectedIndex1 += 1
                     selectedIndex2 += 1
                     printSequence = True
             elif keys[pygame.K_x]:
-                head = swap_nodes(head, selectedIndex1, selectedIndex2)
+                sequence.swap(selectedIndex1, selectedIndex2)
                 printSequence = True
 
             clock.tick(10)
 
         else:
             screen.fill(WHITE)
-            display_linked_list(screen, head, bracket1, bracket2)
-            text = font.render("Congratulations! You unscrambled the sequence and unlocked the door!", True, RED)
+            display_linked_list(screen, sequence, bracket1, bracket2, text_cache)
+            text = text_cache.render("Congratulations! You unscrambled the sequence and unlocked the door!", FONT_SIZE, RED)
             screen.blit(text, (50, 250))
             pygame.display.flip()
             pygame.time.delay(3000)
@@ -158,18 +95,19 @@ def play_game(screen, head):
 
     pygame.quit()
 
-def free_linked_list(head):
-    while head:
-        temp = head
-        head = head.next
-        temp = None
+def sequence_length(text):
+    # The brackets always cover a pair, so there must be at least two items.
+    length = int(text)
+    if length < 2:
+        raise argparse.ArgumentTypeError("must be at least 2")
+    return length
 
 if __name__ == "__main__":
-    sequence = [3, 1, 4, 2]
-    head = create_linked_list(sequence)
-    head = shuffle_linked_list(head)
-    WINDOW_SIZE = [(WIDTH + MARGIN) * len(sequence) + MARGIN, HEIGHT + 2 * MARGIN]
+    parser = argparse.ArgumentParser(description="Sequence Arrangement Puzzle")
+    parser.add_argument('--length', type=sequence_length, default=None, help="scramble the numbers 1..LENGTH instead of the default four")
+    args = parser.parse_args()
+    sequence = NodeSequence(list(range(1, args.length + 1)) if args.length else [3, 1, 4, 2])
+    sequence.shuffle()
+    WINDOW_SIZE = [(WIDTH + MARGIN) * min(len(sequence), MAX_VISIBLE) + MARGIN, HEIGHT + 2 * MARGIN]
     screen = pygame.display.set_mode(WINDOW_SIZE)
-    play_game(screen, head)
-    free_linked_list(head)
-
+    play_game(screen, sequence)
@@ -0,0 +1,108 @@
+class QueueError(Exception):
+    pass
+
+class QueueEmpty(QueueError):
+    pass
+
+class QueueFull(QueueError):
+    pass
+
+class Queue:
+    # Fixed-capacity ring buffer: the items live in a list of `capacity`
+    # slots and the front is just an index into it, so every operation,
+    # rotating the front to the rear included, is O(1) and allocates
+    # nothing. The number of adjacent pairs (front to rear) that are out of
+    # order is updated by each operation, which makes isSorted() a single
+    # comparison.
+    __slots__ = ('items', 'capacity', 'head', 'size', 'out_of_order')
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.items = [None] * capacity
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+        self.out_of_order = 0
+
+    @classmethod
+    def from_values(cls, values, capacity=None):
+        values = list(values)
+        queue = cls(capacity or max(len(values), 1))
+        for value in values:
+            queue.enqueue(value)
+        return queue
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError("queue index out of range")
+        return self.items[(self.head + index) % self.capacity]
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self.items[(self.head + index) % self.capacity]
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def isFull(self):
+        return self.size == self.capacity
+
+    def isSorted(self):
+        return self.out_of_order == 0
+
+    def peek(self):
+        if self.size == 0:
+            raise QueueEmpty("peek at an empty queue")
+        return self.items[self.head]
+
+    def enqueue(self, data):
+        if self.size == self.capacity:
+            raise QueueFull("enqueue onto a full queue")
+        if self.size:
+            self.out_of_order += self.items[(self.head + self.size - 1) % self.capacity] > data
+        self.items[(self.head + self.size) % self.capacity] = data
+        self.size += 1
+
+    def dequeue(self):
+        if self.size == 0:
+            raise QueueEmpty("dequeue from an empty queue")
+        data = self.items[self.head]
+        self.items[self.head] = None
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        if self.size:
+            self.out_of_order -= data > self.items[self.head]
+        return data
+
+    def swapFront(self):
+        # Exchanges the front two items; only the pairs they belong to can
+        # change order.
+        if self.size < 2:
+            raise QueueError("swapping needs at least two items")
+        items = self.items
+        first = self.head
+        second = (first + 1) % self.capacity
+        a, b = items[first], items[second]
+        if self.size > 2:
+            c = items[(first + 2) % self.capacity]
+            self.out_of_order += (a > c) - (b > c)
+        self.out_of_order += (b > a) - (a > b)
+        items[first], items[second] = b, a
+
+    def rotate(self):
+        # Sends the front item to the rear. A full buffer already has it in
+        # the slot after the rear, so only the head index moves.
+        if self.size < 2:
+            raise QueueError("rotating needs at least two items")
+        items = self.items
+        front = items[self.head]
+        rear = items[(self.head + self.size - 1) % self.capacity]
+        self.out_of_order += (rear > front) - (front > items[(self.head + 1) % self.capacity])
+        if self.size < self.capacity:
+            items[(self.head + self.size) % self.capacity] = front
+            items[self.head] = None
+        self.head = (self.head + 1) % self.capacity
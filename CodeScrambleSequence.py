@@ -0,0 +1,100 @@
+import random
+
+class Node:
+    __slots__ = ('data', 'next')
+
+    def __init__(self, data):
+        self.data = data
+        self.next = None
+
+def count_inversions(values):
+    # Pairs that are in the wrong order, counted while merge sorting, so
+    # sequences of thousands of items are counted in O(n log n).
+    values = list(values)
+    if len(values) < 2:
+        return 0, values
+    middle = len(values) // 2
+    left_count, left = count_inversions(values[:middle])
+    right_count, right = count_inversions(values[middle:])
+    count = left_count + right_count
+    merged = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if right[j] < left[i]:
+            merged.append(right[j])
+            count += len(left) - i
+            j += 1
+        else:
+            merged.append(left[i])
+            i += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    return count, merged
+
+class NodeSequence:
+    # Linked nodes with an index array alongside: nodes[i] is the i-th node
+    # of the list, so any position is reached without walking from the
+    # head and a swap only relinks the nodes around the two positions. The
+    # number of inversions is kept up to date by every swap; the sequence is
+    # sorted exactly when it is zero, and it is also the fewest adjacent
+    # swaps that would sort it.
+    def __init__(self, values):
+        self.nodes = [Node(data) for data in values]
+        self.link()
+        self.inversions = count_inversions(values)[0]
+
+    def link(self):
+        nodes = self.nodes
+        for i in range(len(nodes) - 1):
+            nodes[i].next = nodes[i + 1]
+        if nodes:
+            nodes[-1].next = None
+
+    @property
+    def head(self):
+        return self.nodes[0] if self.nodes else None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        return self.nodes[index].data
+
+    def __iter__(self):
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
+
+    def shuffle(self, rng=random):
+        rng.shuffle(self.nodes)
+        self.link()
+        self.inversions = count_inversions(node.data for node in self.nodes)[0]
+
+    def is_sorted(self):
+        return self.inversions == 0
+
+    def swap(self, index1, index2):
+        # Swapping neighbours changes the inversion count by at most one;
+        # further apart, only the items in between can change it, so the
+        # cost grows with the distance rather than the length.
+        if index1 == index2:
+            return
+        if index1 > index2:
+            index1, index2 = index2, index1
+        nodes = self.nodes
+        x, y = nodes[index1], nodes[index2]
+        a, b = x.data, y.data
+        delta = (b > a) - (a > b)
+        for i in range(index1 + 1, index2):
+            c = nodes[i].data
+            delta += (c > a) - (a > c) + (b > c) - (c > b)
+        self.inversions += delta
+        if index1 > 0:
+            nodes[index1 - 1].next = y
+        if index2 == index1 + 1:
+            x.next, y.next = y.next, x
+        else:
+            nodes[index2 - 1].next = x
+            x.next, y.next = y.next, x.next
+        nodes[index1], nodes[index2] = y, x
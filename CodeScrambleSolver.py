@@ -0,0 +1,259 @@
+import argparse
+import itertools
+import os
+import random
+import time
+
+# Minimum move counts for the Code Scramble queue puzzle. A queue is
+# sorted using two moves: SWAP exchanges the front two elements and ROTATE
+# sends the front element to the rear. Positions are permutations of
+# 0..n-1 and are stored by their Lehmer-code rank, a single int in
+# 0..n!-1, so the visited sets hold small ints instead of tuples.
+SWAP, ROTATE = 0, 1
+MOVE_KEYS = '12'
+START = 2
+
+TABLE_MAX_SIZE = 8
+TABLE_MAGIC = b'CSQT\x01'
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CodeScrambleTable.bin')
+
+FACTORIALS = [1]
+for _n in range(1, 21):
+    FACTORIALS.append(FACTORIALS[-1] * _n)
+
+# Distance tables are stored one after another, smallest size first, one
+# byte per permutation indexed by rank.
+TABLE_OFFSETS = [0, 0]
+for _n in range(1, TABLE_MAX_SIZE + 1):
+    TABLE_OFFSETS.append(TABLE_OFFSETS[-1] + FACTORIALS[_n])
+TABLE_BYTES = TABLE_OFFSETS[-1]
+
+_table = None
+
+def rank(permutation):
+    # Each Lehmer digit is the number of smaller items still unused, counted
+    # with a bitmask of the items already seen.
+    n = len(permutation)
+    result = 0
+    used = 0
+    for i in range(n - 1):
+        item = permutation[i]
+        result += (item - (used & ((1 << item) - 1)).bit_count()) * FACTORIALS[n - 1 - i]
+        used |= 1 << item
+    return result
+
+def unrank(value, n):
+    items = list(range(n))
+    permutation = []
+    for i in range(n - 1, -1, -1):
+        digit, value = divmod(value, FACTORIALS[i])
+        permutation.append(items.pop(digit))
+    return tuple(permutation)
+
+def apply_move(move, permutation):
+    if move == SWAP:
+        return (permutation[1], permutation[0]) + permutation[2:]
+    return permutation[1:] + permutation[:1]
+
+def undo_move(move, permutation):
+    if move == SWAP:
+        return (permutation[1], permutation[0]) + permutation[2:]
+    return permutation[-1:] + permutation[:-1]
+
+def labelings(values):
+    # Every way of numbering the values 0..n-1 in sorted order. Equal values
+    # can be numbered either way round, and each numbering has the identity
+    # as its goal, so searching from all of them finds the best sorted
+    # arrangement without a separate goal set.
+    order = sorted(range(len(values)), key=lambda position: values[position])
+    groups = [list(group) for _, group in itertools.groupby(order, key=lambda position: values[position])]
+    for arrangement in itertools.product(*(itertools.permutations(group) for group in groups)):
+        permutation = [0] * len(values)
+        label = 0
+        for group in arrangement:
+            for position in group:
+                permutation[position] = label
+                label += 1
+        yield tuple(permutation)
+
+def build_table(n):
+    # Breadth-first search backwards from the sorted queue over all n!
+    # permutations. SWAP is its own inverse; ROTATE is undone by moving the
+    # rear element to the front.
+    if n < 2:
+        return bytearray(FACTORIALS[n])
+    distances = bytearray(b'\xff') * FACTORIALS[n]
+    identity = tuple(range(n))
+    distances[rank(identity)] = 0
+    frontier = [identity]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for permutation in frontier:
+            for move in (SWAP, ROTATE):
+                previous = undo_move(move, permutation)
+                index = rank(previous)
+                if distances[index] == 255:
+                    distances[index] = depth
+                    next_frontier.append(previous)
+        frontier = next_frontier
+    return distances
+
+def build_tables():
+    return b''.join(bytes(build_table(n)) for n in range(1, TABLE_MAX_SIZE + 1))
+
+def save_tables(tables, path=TABLE_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as table_file:
+        table_file.write(TABLE_MAGIC)
+        table_file.write(tables)
+    os.replace(temp_path, path)
+
+def read_tables(path=TABLE_PATH):
+    try:
+        with open(path, 'rb') as table_file:
+            data = table_file.read()
+    except OSError:
+        return None
+    if not data.startswith(TABLE_MAGIC) or len(data) != len(TABLE_MAGIC) + TABLE_BYTES:
+        return None
+    return data[len(TABLE_MAGIC):]
+
+def load_tables(path=TABLE_PATH):
+    # Built on first use and cached next to this module; later runs only
+    # read the 46 KB file.
+    global _table
+    if _table is None:
+        tables = read_tables(path)
+        if tables is None:
+            tables = build_tables()
+            try:
+                save_tables(tables, path)
+            except OSError:
+                pass
+        _table = tables
+    return _table
+
+def table_distance(permutation):
+    return load_tables()[TABLE_OFFSETS[len(permutation)] + rank(permutation)]
+
+def bidirectional_search(starts, n):
+    # Grows a forward frontier from the starts and a backward one from the
+    # sorted queue a whole layer at a time, always expanding the smaller.
+    # Until the frontiers meet every path is longer than the two depths put
+    # together, so the first meeting is a shortest path. Each visited rank
+    # maps to the move that links it towards its own side's origin, which is
+    # all that is needed to walk the path back.
+    goal = tuple(range(n))
+    forward = {rank(start): START for start in starts}
+    backward = {rank(goal): START}
+    if rank(goal) in forward:
+        return []
+    forward_frontier = list(starts)
+    backward_frontier = [goal]
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            next_frontier = []
+            for permutation in forward_frontier:
+                for move in (SWAP, ROTATE):
+                    child = apply_move(move, permutation)
+                    index = rank(child)
+                    if index in forward:
+                        continue
+                    forward[index] = move
+                    if index in backward:
+                        return join_path(child, forward, backward)
+                    next_frontier.append(child)
+            forward_frontier = next_frontier
+        else:
+            next_frontier = []
+            for permutation in backward_frontier:
+                for move in (SWAP, ROTATE):
+                    parent = undo_move(move, permutation)
+                    index = rank(parent)
+                    if index in backward:
+                        continue
+                    backward[index] = move
+                    if index in forward:
+                        return join_path(parent, forward, backward)
+                    next_frontier.append(parent)
+            backward_frontier = next_frontier
+    return None
+
+def join_path(meeting, forward, backward):
+    path = []
+    permutation = meeting
+    move = forward[rank(permutation)]
+    while move != START:
+        path.append(move)
+        permutation = undo_move(move, permutation)
+        move = forward[rank(permutation)]
+    path.reverse()
+    permutation = meeting
+    move = backward[rank(permutation)]
+    while move != START:
+        path.append(move)
+        permutation = apply_move(move, permutation)
+        move = backward[rank(permutation)]
+    return path
+
+def solve(values):
+    # Shortest list of moves (SWAP or ROTATE) that sorts the values. Small
+    # queues read the path off the distance table by always taking a move
+    # that gets one step closer; larger ones use the bidirectional search.
+    values = list(values)
+    starts = list(labelings(values))
+    if len(values) <= TABLE_MAX_SIZE:
+        permutation = min(starts, key=table_distance)
+        path = []
+        distance = table_distance(permutation)
+        while distance:
+            for move in (SWAP, ROTATE):
+                child = apply_move(move, permutation)
+                if table_distance(child) == distance - 1:
+                    break
+            path.append(move)
+            permutation = child
+            distance -= 1
+        return path
+    return bidirectional_search(starts, len(values))
+
+def par(values):
+    values = list(values)
+    if len(values) <= TABLE_MAX_SIZE:
+        return min(table_distance(permutation) for permutation in labelings(values))
+    return len(solve(values))
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimum move counts for the Code Scramble queue puzzle.")
+    parser.add_argument('--size', type=int, default=5)
+    parser.add_argument('--count', type=int, default=100, help="number of random queues to solve")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--search', action='store_true', help="use the bidirectional search even where a table exists")
+    parser.add_argument('--build-table', action='store_true', help="rebuild the distance table file and exit")
+    args = parser.parse_args()
+    if args.build_table:
+        started = time.perf_counter()
+        save_tables(build_tables())
+        print(f"wrote {TABLE_PATH} ({TABLE_BYTES} entries) in {time.perf_counter() - started:.2f}s")
+        return
+    rng = random.Random(args.seed)
+    load_tables()
+    total_moves = 0
+    longest = 0
+    started = time.perf_counter()
+    for _ in range(args.count):
+        values = [rng.randint(0, 99) for _ in range(args.size)]
+        if args.search:
+            moves = len(bidirectional_search(list(labelings(values)), args.size))
+        else:
+            moves = par(values)
+        total_moves += moves
+        longest = max(longest, moves)
+    elapsed = time.perf_counter() - started
+    print(f"size {args.size}: {args.count} queues, par mean {total_moves / args.count:.2f} max {longest}, "
+          f"{elapsed * 1000 / args.count:.3f} ms per queue")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import random
+import time
+
+import MazeSolver
+from MazeSolver import MazeGrid, ComponentIndex, OPEN, WALL
+
+# Target for both building the index and a single solve; times over it are
+# marked with '!' in the table.
+TIME_BUDGET_SECONDS = 1.0
+
+def random_grid(size, density, seed):
+    # Scattered single-cell walls. Random bytes are mapped to cells with one translate() per
+    # row so building a 4096x4096 grid takes well under a second.
+    rng = random.Random(seed)
+    threshold = int(density * 256)
+    table = bytes(WALL if value < threshold else OPEN for value in range(256))
+    grid = MazeGrid(size, size)
+    for row in range(size):
+        start = grid.index((row, 0))
+        grid.cells[start:start + size] = rng.randbytes(size).translate(table)
+    return grid
+
+def format_time(elapsed, width):
+    mark = '!' if elapsed > TIME_BUDGET_SECONDS else ' '
+    return f"{elapsed:>{width - 2}.3f}s{mark}"
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def nearest_in_region(index, region, size, from_far_corner):
+    # Walks the anti-diagonals out from one corner.
+    for total in range(2 * size - 1):
+        for row in range(max(0, total - size + 1), min(size - 1, total) + 1):
+            position = (row, total - row)
+            if from_far_corner:
+                position = (size - 1 - position[0], size - 1 - position[1])
+            if index.label(position) == region:
+                return position
+
+def run_solver_benchmark(sizes=(256, 1024, 4096), density=0.25, seed=0):
+    print(f"{'size':>6}{'index':>9} {'bfs':>9} {'astar':>9} {'jps':>9} {'path':>8}")
+    for size in sizes:
+        grid, _ = timed(random_grid, size, density, seed)
+        index, index_time = timed(ComponentIndex, grid)
+        # Race across the largest open region, from the cell nearest the
+        # top-left corner to the one nearest the bottom-right.
+        region = max(range(1, len(index.sizes)), key=index.sizes.__getitem__)
+        start = nearest_in_region(index, region, size, False)
+        goal = nearest_in_region(index, region, size, True)
+        times = []
+        lengths = set()
+        for method in ('bfs', 'astar', 'jps'):
+            path, elapsed = timed(MazeSolver.solve, grid, start, goal, method)
+            times.append(elapsed)
+            lengths.add(len(path))
+        assert len(lengths) == 1, "solvers disagree on the shortest path"
+        print(f"{size:>6}" + format_time(index_time, 10) + "".join(format_time(elapsed, 10) for elapsed in times)
+              + f"{lengths.pop():>8}")
+    print(f"! over the {TIME_BUDGET_SECONDS:g} s budget")
+
+def run_query_benchmark(size=1024, density=0.25, queries=100000, seed=0):
+    grid = random_grid(size, density, seed)
+    index = ComponentIndex(grid)
+    rng = random.Random(seed)
+    pairs = [((rng.randrange(size), rng.randrange(size)), (rng.randrange(size), rng.randrange(size)))
+             for _ in range(queries)]
+    start = time.perf_counter()
+    for a, b in pairs:
+        index.connected(a, b)
+    elapsed = time.perf_counter() - start
+    print(f"reachability query: {elapsed / queries * 1e6:.2f} us "
+          f"({index.component_count} regions on {size}x{size})")
+
+if __name__ == "__main__":
+    run_solver_benchmark()
+    print()
+    run_query_benchmark()
@@ -0,0 +1,92 @@
+import mmap
+import os
+import struct
+
+from MazeSolver import MazeGrid
+
+# Packed maze file (little-endian):
+#   header: FILE_MAGIC, width, height, start row/col, exit row/col (u32 each)
+#   then height rows of ceil(width / 8) bytes, one bit per cell, most
+#   significant bit first, 1 for wall. Rows start on a byte boundary so any
+#   rectangle can be read without unpacking the rows around it.
+FILE_MAGIC = b'AMZE\x01'
+HEADER = struct.Struct('<6I')
+DATA_OFFSET = len(FILE_MAGIC) + HEADER.size
+
+# One packed byte <-> eight cell bytes.
+UNPACK = [bytes((byte >> shift) & 1 for shift in range(7, -1, -1)) for byte in range(256)]
+PACK = {cells: byte for byte, cells in enumerate(UNPACK)}
+
+def pack_row(row):
+    padded = bytes(row) + bytes(-len(row) % 8)
+    return bytes(PACK[padded[offset:offset + 8]] for offset in range(0, len(padded), 8))
+
+def unpack_row(packed, width):
+    return b''.join([UNPACK[byte] for byte in packed])[:width]
+
+def save(grid, path):
+    temp_path = path + '.tmp'
+    start = grid.start or (0, 0)
+    exit_ = grid.exit or (0, 0)
+    with open(temp_path, 'wb') as maze_file:
+        maze_file.write(FILE_MAGIC)
+        maze_file.write(HEADER.pack(grid.width, grid.height, start[0], start[1], exit_[0], exit_[1]))
+        for row in range(grid.height):
+            maze_file.write(pack_row(grid.row_bytes(row)))
+    os.replace(temp_path, path)
+
+def load_grid(path):
+    # Reads a whole file into a MazeGrid; fine for anything the solvers will
+    # be run over. Use MazeFile for mazes that should stay on disk.
+    with MazeFile(path) as maze:
+        grid = MazeGrid(maze.width, maze.height)
+        for row in range(maze.height):
+            index = grid.index((row, 0))
+            grid.cells[index:index + maze.width] = unpack_row(maze.packed_row(row), maze.width)
+        grid.start = maze.start
+        grid.exit = maze.exit
+    return grid
+
+class MazeFile:
+    # A packed maze left on disk behind a memory map. Cells are read straight
+    # from the mapped bits, so only the pages holding rows near the player
+    # are ever read in, and MazeView keeps rendered surfaces only for the
+    # chunks around the camera; memory follows the area around the player
+    # rather than the size of the maze.
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(FILE_MAGIC)] != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a packed maze file")
+        width, height, start_row, start_col, exit_row, exit_col = HEADER.unpack_from(self.map, len(FILE_MAGIC))
+        self.width = width
+        self.height = height
+        self.start = (start_row, start_col)
+        self.exit = (exit_row, exit_col)
+        self.row_size = (width + 7) // 8
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def packed_row(self, row):
+        offset = DATA_OFFSET + row * self.row_size
+        return self.map[offset:offset + self.row_size]
+
+    def in_bounds(self, position):
+        row, col = position
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def is_open(self, position):
+        if not self.in_bounds(position):
+            return False
+        row, col = position
+        byte = self.map[DATA_OFFSET + row * self.row_size + (col >> 3)]
+        return not (byte >> (7 - (col & 7))) & 1
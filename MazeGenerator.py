@@ -0,0 +1,131 @@
+import argparse
+import random
+import time
+
+import MazeFile
+from MazeSolver import MazeGrid, OPEN
+
+# Perfect mazes (exactly one path between any two cells) on the usual
+# odd-sized layout: room (r, c) sits at grid cell (2r + 1, 2c + 1) and the
+# cells between rooms are knocked through as passages are carved.
+
+def room_layout(width, height):
+    if width < 3 or height < 3:
+        raise ValueError("a maze needs to be at least 3x3")
+    grid = MazeGrid(width, height)
+    rooms_wide = (width - 1) // 2
+    rooms_high = (height - 1) // 2
+    stride = grid.stride
+    rooms = [(2 * row + 2) * stride + 2 * col + 2 for row in range(rooms_high) for col in range(rooms_wide)]
+    # Moving to a neighbouring room is two grid cells in one direction.
+    steps = (-2 * stride, 2 * stride, -2, 2)
+    return grid, rooms, steps
+
+def finish(grid):
+    grid.start = (1, 1)
+    grid.exit = (2 * ((grid.height - 1) // 2) - 1, 2 * ((grid.width - 1) // 2) - 1)
+    return grid
+
+def recursive_backtracker(width, height, rng):
+    # Depth-first carving with an explicit stack: long winding corridors and
+    # few branches.
+    grid, rooms, steps = room_layout(width, height)
+    cells = grid.cells
+    room_set = set(rooms)
+    start = rooms[0]
+    cells[start] = OPEN
+    stack = [start]
+    while stack:
+        room = stack[-1]
+        choices = [step for step in steps if room + step in room_set and cells[room + step]]
+        if not choices:
+            stack.pop()
+            continue
+        step = rng.choice(choices)
+        cells[room + step // 2] = OPEN
+        cells[room + step] = OPEN
+        stack.append(room + step)
+    return finish(grid)
+
+def kruskal(width, height, rng):
+    # Knocks out the walls between rooms in random order, skipping any wall
+    # whose rooms are already joined: many short dead ends.
+    grid, rooms, steps = room_layout(width, height)
+    cells = grid.cells
+    room_set = set(rooms)
+    parent = {room: room for room in rooms}
+
+    def find(room):
+        root = room
+        while parent[root] != root:
+            root = parent[root]
+        while parent[room] != root:
+            parent[room], room = root, parent[room]
+        return root
+
+    walls = [(room, room + step) for room in rooms for step in (steps[1], steps[3]) if room + step in room_set]
+    rng.shuffle(walls)
+    for room in rooms:
+        cells[room] = OPEN
+    for room, other in walls:
+        root, other_root = find(room), find(other)
+        if root != other_root:
+            parent[other_root] = root
+            cells[(room + other) // 2] = OPEN
+    return finish(grid)
+
+def wilson(width, height, rng):
+    # Loop-erased random walks from unvisited rooms into the maze so far,
+    # which samples uniformly from every possible perfect maze.
+    grid, rooms, steps = room_layout(width, height)
+    cells = grid.cells
+    room_set = set(rooms)
+    first = rng.choice(rooms)
+    in_maze = {first}
+    cells[first] = OPEN
+    remaining = list(rooms)
+    rng.shuffle(remaining)
+    for walk_start in remaining:
+        if walk_start in in_maze:
+            continue
+        # Remember only the last way out of each room; following those
+        # afterwards erases the loops the walk made.
+        exits = {}
+        room = walk_start
+        while room not in in_maze:
+            step = rng.choice(steps)
+            while room + step not in room_set:
+                step = rng.choice(steps)
+            exits[room] = step
+            room += step
+        room = walk_start
+        while room not in in_maze:
+            step = exits[room]
+            in_maze.add(room)
+            cells[room] = OPEN
+            cells[room + step // 2] = OPEN
+            room += step
+    return finish(grid)
+
+GENERATORS = {'backtracker': recursive_backtracker, 'kruskal': kruskal, 'wilson': wilson}
+
+def generate(width, height, algorithm='backtracker', seed=None):
+    return GENERATORS[algorithm](width, height, random.Random(seed))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a packed maze file for ArrayMaze.")
+    parser.add_argument('output')
+    parser.add_argument('--algorithm', choices=sorted(GENERATORS), default='backtracker')
+    parser.add_argument('--width', type=int, default=1025)
+    parser.add_argument('--height', type=int, default=1025)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    grid = generate(args.width, args.height, args.algorithm, args.seed)
+    MazeFile.save(grid, args.output)
+    print(f"{args.width}x{args.height} {args.algorithm} maze written to {args.output} "
+          f"in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
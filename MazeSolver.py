@@ -0,0 +1,299 @@
+import heapq
+import re
+from array import array
+
+WALL = 1
+OPEN = 0
+
+# Cells are stored one byte each in a flat bytearray with a one-cell wall
+# border, so row r, column c lives at (r + 1) * stride + c + 1 and a
+# neighbour is always index +/- 1 or +/- stride with no bounds checks.
+
+class MazeGrid:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.cells = bytearray([WALL]) * (self.stride * (height + 2))
+        self.start = None
+        self.exit = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        # Rows of characters as in ArrayMaze: '#' wall, 'S' start, 'E' exit,
+        # anything else open.
+        grid = cls(max(len(row) for row in rows), len(rows))
+        for row, line in enumerate(rows):
+            for col, cell in enumerate(line):
+                if cell != '#':
+                    grid.cells[grid.index((row, col))] = OPEN
+                if cell == 'S':
+                    grid.start = (row, col)
+                elif cell == 'E':
+                    grid.exit = (row, col)
+        return grid
+
+    def index(self, position):
+        row, col = position
+        return (row + 1) * self.stride + col + 1
+
+    def position(self, index):
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def in_bounds(self, position):
+        row, col = position
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def is_open(self, position):
+        return self.in_bounds(position) and self.cells[self.index(position)] == OPEN
+
+    def set_open(self, position, is_open=True):
+        self.cells[self.index(position)] = OPEN if is_open else WALL
+
+    def row_bytes(self, row):
+        start = (row + 1) * self.stride + 1
+        return self.cells[start:start + self.width]
+
+def trace_path(grid, parents, goal):
+    path = []
+    index = goal
+    while index is not None:
+        path.append(grid.position(index))
+        index = parents[index]
+    path.reverse()
+    return path
+
+def bfs(grid, start, goal):
+    # Shortest path as a list of (row, col) from start to goal inclusive, or
+    # None when there is none. Cells are marked as they are queued, one
+    # frontier list per distance.
+    cells = grid.cells
+    stride = grid.stride
+    start_index = grid.index(start)
+    goal_index = grid.index(goal)
+    if cells[start_index] or cells[goal_index]:
+        return None
+    parents = {start_index: None}
+    frontier = [start_index]
+    while frontier and goal_index not in parents:
+        next_frontier = []
+        for index in frontier:
+            for neighbor in (index - stride, index + stride, index - 1, index + 1):
+                if not cells[neighbor] and neighbor not in parents:
+                    parents[neighbor] = index
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    if goal_index not in parents:
+        return None
+    return trace_path(grid, parents, goal_index)
+
+def astar(grid, start, goal):
+    # A* with the Manhattan distance, which is exact on an open grid, so the
+    # search only widens where walls force a detour. Among equal estimates
+    # the deeper node is expanded first.
+    cells = grid.cells
+    stride = grid.stride
+    start_index = grid.index(start)
+    goal_index = grid.index(goal)
+    if cells[start_index] or cells[goal_index]:
+        return None
+    goal_row, goal_col = divmod(goal_index, stride)
+    parents = {start_index: None}
+    costs = {start_index: 0}
+    frontier = [(0, 0, start_index)]
+    while frontier:
+        _, negative_cost, index = heapq.heappop(frontier)
+        if index == goal_index:
+            return trace_path(grid, parents, goal_index)
+        cost = -negative_cost
+        if cost > costs[index]:
+            continue
+        cost += 1
+        for neighbor in (index - stride, index + stride, index - 1, index + 1):
+            if cells[neighbor] or costs.get(neighbor, cost + 1) <= cost:
+                continue
+            costs[neighbor] = cost
+            parents[neighbor] = index
+            row, col = divmod(neighbor, stride)
+            heapq.heappush(frontier, (cost + abs(row - goal_row) + abs(col - goal_col), -cost, neighbor))
+    return None
+
+def jump_horizontal(cells, stride, index, step, goal_index):
+    # Runs along a row until the goal, a wall, or a cell where a vertical
+    # move opens up that was not reachable from the row behind it.
+    while True:
+        index += step
+        if cells[index]:
+            return None
+        if index == goal_index:
+            return index
+        if (not cells[index - stride] and cells[index - stride - step]) or \
+                (not cells[index + stride] and cells[index + stride - step]):
+            return index
+
+def jump_vertical(cells, stride, index, step, goal_index):
+    # Vertical runs also stop wherever a horizontal run from the cell would
+    # find something, which plays the part of the diagonal scan in 8-way JPS.
+    while True:
+        index += step
+        if cells[index]:
+            return None
+        if index == goal_index:
+            return index
+        if (not cells[index - 1] and cells[index - 1 - step]) or \
+                (not cells[index + 1] and cells[index + 1 - step]):
+            return index
+        if jump_horizontal(cells, stride, index, -1, goal_index) is not None or \
+                jump_horizontal(cells, stride, index, 1, goal_index) is not None:
+            return index
+
+def jps(grid, start, goal):
+    # Jump Point Search for four-way movement. Straight runs are scanned
+    # without touching the open list and only their end points are queued;
+    # the returned path is expanded back to every cell.
+    cells = grid.cells
+    stride = grid.stride
+    start_index = grid.index(start)
+    goal_index = grid.index(goal)
+    if cells[start_index] or cells[goal_index]:
+        return None
+    goal_row, goal_col = divmod(goal_index, stride)
+    parents = {start_index: None}
+    costs = {start_index: 0}
+    frontier = [(0, 0, start_index, 0)]
+    while frontier:
+        _, negative_cost, index, direction = heapq.heappop(frontier)
+        if index == goal_index:
+            return expand_jumps(grid, trace_path(grid, parents, goal_index))
+        cost = -negative_cost
+        if cost > costs[index]:
+            continue
+        if direction == 0:
+            directions = (-stride, stride, -1, 1)
+        elif direction in (-1, 1):
+            # Arrived horizontally: keep going, or turn where forced.
+            directions = [direction]
+            for vertical in (-stride, stride):
+                if not cells[index + vertical] and cells[index + vertical - direction]:
+                    directions.append(vertical)
+        else:
+            # Arrived vertically: keep going, turn either way, or turn back
+            # the other way along a row where forced.
+            directions = (direction, -1, 1)
+        for step in directions:
+            if step in (-1, 1):
+                jump = jump_horizontal(cells, stride, index, step, goal_index)
+            else:
+                jump = jump_vertical(cells, stride, index, step, goal_index)
+            if jump is None:
+                continue
+            jump_cost = cost + abs(jump - index) // abs(step)
+            if costs.get(jump, jump_cost + 1) <= jump_cost:
+                continue
+            costs[jump] = jump_cost
+            parents[jump] = index
+            row, col = divmod(jump, stride)
+            heapq.heappush(frontier, (jump_cost + abs(row - goal_row) + abs(col - goal_col), -jump_cost, jump, step))
+    return None
+
+def expand_jumps(grid, jump_points):
+    path = [jump_points[0]]
+    for row, col in jump_points[1:]:
+        last_row, last_col = path[-1]
+        d_row = (row > last_row) - (row < last_row)
+        d_col = (col > last_col) - (col < last_col)
+        while (last_row, last_col) != (row, col):
+            last_row += d_row
+            last_col += d_col
+            path.append((last_row, last_col))
+    return path
+
+SOLVERS = {'bfs': bfs, 'astar': astar, 'jps': jps}
+
+def solve(grid, start=None, goal=None, method='astar'):
+    return SOLVERS[method](grid, start or grid.start, goal or grid.exit)
+
+OPEN_RUN = re.compile(b'\x00+')
+
+class ComponentIndex:
+    # Labels every open cell with the id of its connected region so "can I
+    # get from a to b" is two array reads. Regions are found row by row as
+    # runs of open cells, joining each run to the runs it touches in the row
+    # above with union-find; walls get label 0 and regions count from 1.
+    # Building is a pure-Python pass over every cell, so it fits in a second
+    # up to about 1024x1024 (0.6 s measured); 2048x2048 takes about 3 s and
+    # 4096x4096 about 11 s. Past that size build it once per maze, not per
+    # query, or use a single search instead.
+    def __init__(self, grid):
+        self.grid = grid
+        self.labels = array('i', [0]) * len(grid.cells)
+        self.sizes = [0]
+        self.build()
+
+    def build(self):
+        grid = self.grid
+        parent = []
+
+        def find(run):
+            root = run
+            while parent[root] != root:
+                root = parent[root]
+            while parent[run] != root:
+                parent[run], run = root, parent[run]
+            return root
+
+        runs = []
+        previous = []
+        for row in range(grid.height):
+            base = grid.index((row, 0))
+            current = []
+            for match in OPEN_RUN.finditer(grid.row_bytes(row)):
+                run = len(parent)
+                parent.append(run)
+                start, end = match.span()
+                current.append((start, end, run))
+                runs.append((base + start, end - start, run))
+            # Two runs in neighbouring rows touch when their column ranges
+            # overlap; walk both sorted lists together.
+            i = j = 0
+            while i < len(previous) and j < len(current):
+                above_start, above_end, above = previous[i]
+                start, end, run = current[j]
+                if above_start < end and start < above_end:
+                    root_above, root = find(above), find(run)
+                    if root_above != root:
+                        parent[root] = root_above
+                if above_end < end:
+                    i += 1
+                else:
+                    j += 1
+            previous = current
+
+        labels = self.labels
+        sizes = self.sizes
+        component_of_root = {}
+        for index, length, run in runs:
+            root = find(run)
+            component = component_of_root.get(root)
+            if component is None:
+                component = component_of_root[root] = len(sizes)
+                sizes.append(0)
+            labels[index:index + length] = array('i', [component]) * length
+            sizes[component] += length
+
+    @property
+    def component_count(self):
+        return len(self.sizes) - 1
+
+    def label(self, position):
+        if not self.grid.in_bounds(position):
+            return 0
+        return self.labels[self.grid.index(position)]
+
+    def size(self, position):
+        return self.sizes[self.label(position)]
+
+    def connected(self, a, b):
+        label = self.label(a)
+        return label != 0 and label == self.label(b)
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+
+import pygame
+
+FLOOR, WALL, START, EXIT = range(4)
+TILE_COLORS = {FLOOR: (0, 0, 0), WALL: (255, 255, 255), START: (0, 255, 0), EXIT: (255, 0, 0)}
+
+CHUNK_CELLS = 16
+MAX_CHUNK_SURFACES = 16
+
+class Camera:
+    # Top-left corner of the view in world pixels, kept inside the maze so
+    # the view never scrolls past its edges.
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, x, y):
+        self.x = max(0, min(x - self.view_width // 2, self.world_width - self.view_width))
+        self.y = max(0, min(y - self.view_height // 2, self.world_height - self.view_height))
+
+    def to_screen(self, x, y):
+        return (x - self.x, y - self.y)
+
+class MazeRenderer:
+    # Draws the maze a chunk at a time. Each tile kind is rendered once into
+    # a small atlas, chunks of CHUNK_CELLS x CHUNK_CELLS cells are composed
+    # from the atlas the first time they scroll into view and kept in an LRU
+    # cache, and a frame only blits the handful of chunks the camera
+    # overlaps, however large the maze is.
+    def __init__(self, level, tile_size, colors=TILE_COLORS, chunk_cells=CHUNK_CELLS, max_chunks=MAX_CHUNK_SURFACES):
+        self.level = level
+        self.colors = colors
+        self.tile_size = tile_size
+        self.chunk_cells = chunk_cells
+        self.chunk_pixels = chunk_cells * tile_size
+        self.max_chunks = max_chunks
+        self.atlas = {}
+        for kind, color in colors.items():
+            tile = pygame.Surface((tile_size, tile_size))
+            tile.fill(color)
+            self.atlas[kind] = tile
+        self.chunks = OrderedDict()
+
+    @property
+    def world_size(self):
+        return (self.level.width * self.tile_size, self.level.height * self.tile_size)
+
+    def invalidate(self, position=None):
+        # Call after the maze changes: with a cell, only its chunk is redrawn;
+        # without one, everything is.
+        if position is None:
+            self.chunks.clear()
+        else:
+            self.chunks.pop((position[0] // self.chunk_cells, position[1] // self.chunk_cells), None)
+
+    def tile_kind(self, position):
+        if not self.level.is_open(position):
+            return WALL
+        if position == self.level.start:
+            return START
+        if position == self.level.exit:
+            return EXIT
+        return FLOOR
+
+    def render_chunk(self, chunk_row, chunk_col):
+        size = self.tile_size
+        surface = pygame.Surface((self.chunk_pixels, self.chunk_pixels))
+        surface.fill(self.colors[FLOOR])
+        first_row = chunk_row * self.chunk_cells
+        first_col = chunk_col * self.chunk_cells
+        for row in range(first_row, min(first_row + self.chunk_cells, self.level.height)):
+            for col in range(first_col, min(first_col + self.chunk_cells, self.level.width)):
+                kind = self.tile_kind((row, col))
+                if kind != FLOOR:
+                    surface.blit(self.atlas[kind], ((col - first_col) * size, (row - first_row) * size))
+        return surface
+
+    def chunk_surface(self, chunk_row, chunk_col):
+        key = (chunk_row, chunk_col)
+        surface = self.chunks.get(key)
+        if surface is None:
+            surface = self.chunks[key] = self.render_chunk(chunk_row, chunk_col)
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return surface
+
+    def draw(self, screen, camera):
+        chunk_pixels = self.chunk_pixels
+        last_row = (min(camera.y + camera.view_height, self.world_size[1]) - 1) // chunk_pixels
+        last_col = (min(camera.x + camera.view_width, self.world_size[0]) - 1) // chunk_pixels
+        for chunk_row in range(camera.y // chunk_pixels, last_row + 1):
+            for chunk_col in range(camera.x // chunk_pixels, last_col + 1):
+                screen.blit(self.chunk_surface(chunk_row, chunk_col),
+                            camera.to_screen(chunk_col * chunk_pixels, chunk_row * chunk_pixels))
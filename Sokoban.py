@@ -1,7 +1,11 @@
+import argparse
 import pygame
 import sys
-from collections import deque
-import heapq
+
+import SokobanSolver
+from SokobanBoard import Board
+from SokobanLevels import LevelPack
+from SokobanRenderer import BoardRenderer
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -12,6 +16,7 @@ LIGHT_BLUE = (173, 216, 230)
 
 CELL_SIZE = 30  
 MARGIN = 3  
+REPLAY_PATH = "sokoban.lurd"
 
 game_map = [
     "######################",
@@ -37,65 +42,90 @@ target_spots = [(14, 1), (14, 13), (2, 5), (5, 2), (10, 10)]
 
 box_positions = [(5, 5), (9, 9), (11,12), (3, 4), (7, 5)]
 
-WINDOW_WIDTH = len(game_map[0]) * (CELL_SIZE + MARGIN) + MARGIN
-WINDOW_HEIGHT = len(game_map) * (CELL_SIZE + MARGIN) + MARGIN
+COLORS = {
+    'margin': WHITE,
+    'floor': WHITE,
+    'wall': BLACK,
+    'target': LIGHT_BLUE,
+    'box': GREEN,
+    'player': RED,
+}
+
+parser = argparse.ArgumentParser(description="Sokoban")
+parser.add_argument('--pack', help="play levels from an XSB level-pack file")
+parser.add_argument('--level', type=int, default=1, help="level number in the pack, from 1")
+parser.add_argument('--solve', action='store_true', help="print a solution for the level and exit")
+parser.add_argument('--replay', help="start from the position after a saved LURD replay")
+args = parser.parse_args()
+
+pack = LevelPack(args.pack) if args.pack else None
+level_number = args.level - 1
+if pack is not None and not 0 <= level_number < len(pack):
+    parser.error(f"{args.pack} has levels 1 to {len(pack)}")
+
+if args.solve:
+    if pack is None:
+        level = SokobanSolver.Level(game_map, box_positions, target_spots, player_pos)
+    else:
+        try:
+            level = SokobanSolver.Level.from_xsb(pack.lines(level_number))
+        except ValueError as error:
+            parser.error(f"level {args.level} of {args.pack} is invalid: {error}")
+    solution, stats = SokobanSolver.solve(level)
+    print(SokobanSolver.format_stats("Sokoban", stats))
+    if solution:
+        print(solution)
+    sys.exit()
 
 pygame.init()
 
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-
 pygame.display.set_caption("Sokoban")
 
 clock = pygame.time.Clock()
 
 
-def draw_map():
-    for row in range(len(game_map)):
-        for col in range(len(game_map[row])):
-            color = WHITE
-            if game_map[row][col] == "#":
-                color = BLACK
-            pygame.draw.rect(screen, color, [(MARGIN + CELL_SIZE) * col + MARGIN,
-                                              (MARGIN + CELL_SIZE) * row + MARGIN,
-                                              CELL_SIZE,
-                                              CELL_SIZE])
-
-
-def draw_player():
-    pygame.draw.circle(screen, RED, ((MARGIN + CELL_SIZE) * player_pos[0] + MARGIN + CELL_SIZE // 2,
-                                     (MARGIN + CELL_SIZE) * player_pos[1] + MARGIN + CELL_SIZE // 2),
-                       min(CELL_SIZE, CELL_SIZE) // 2)
-
-
-def draw_boxes():
-    for pos in box_positions:
-        pygame.draw.rect(screen, GREEN, ((MARGIN + CELL_SIZE) * pos[0] + MARGIN,
-                                         (MARGIN + CELL_SIZE) * pos[1] + MARGIN,
-                                         CELL_SIZE, CELL_SIZE))
-
-
-def draw_targets():
-    for pos in target_spots:
-        pygame.draw.rect(screen, LIGHT_BLUE, ((MARGIN + CELL_SIZE) * pos[0] + MARGIN,
-                                               (MARGIN + CELL_SIZE) * pos[1] + MARGIN,
-                                               CELL_SIZE, CELL_SIZE))
+def load_level(number):
+    # Returns False, leaving the current level in play, if the pack's level
+    # cannot be parsed.
+    global board, renderer, screen, level_number
+    if pack is None:
+        board = Board(game_map, box_positions, target_spots, player_pos)
+    else:
+        try:
+            board = pack.board(number)
+        except ValueError as error:
+            print(f"Skipping level {number + 1}: {error}")
+            return False
+        title = pack.title(number)
+        pygame.display.set_caption(f"Sokoban - level {number + 1}" + (f": {title}" if title else ""))
+    renderer = BoardRenderer(board, CELL_SIZE, MARGIN, COLORS)
+    screen = pygame.display.set_mode(renderer.size)
+    level_number = number
+    return True
+
+
+def change_level(offset):
+    # Moves by offset, then on past any levels that fail to load.
+    step = 1 if offset > 0 else -1
+    number = level_number + offset
+    while pack is not None and 0 <= number < len(pack):
+        if load_level(number):
+            return True
+        number += step
+    return False
 
 
 def move_player(dx, dy):
-    global player_pos
-    x = player_pos[0] + dx
-    y = player_pos[1] + dy
+    board.move(dx, dy)
 
-    if (x, y) not in box_positions and game_map[y][x] != "#":
-        player_pos = (x, y)
-    elif (x, y) in box_positions:
-        new_x = x + dx
-        new_y = y + dy
-        if game_map[new_y][new_x] != "#" and (new_x, new_y) not in box_positions:
-            box_positions.remove((x, y))
-            box_positions.append((new_x, new_y))
-            player_pos = (x, y)
 
+if not load_level(level_number) and not change_level(1):
+    parser.error(f"{args.pack} has no playable level from level {args.level} on")
+if args.replay:
+    try:
+        board.load_replay(args.replay)
+    except (OSError, ValueError) as error:
+        parser.error(f"could not load replay {args.replay}: {error}")
 
 while True:
     for event in pygame.event.get(): 
@@ -111,23 +141,33 @@ while True:
                 move_player(0, -1)
             elif event.key == pygame.K_DOWN:
                 move_player(0, 1)
-
-    screen.fill(WHITE)
-
-    draw_map()
-
-    draw_targets()
-
-    draw_boxes()
-
-    draw_player()
-
-    win = all(box_pos in target_spots for box_pos in box_positions)
-    if win:
+            elif event.key in (pygame.K_z, pygame.K_BACKSPACE):
+                board.undo()
+            elif event.key == pygame.K_y:
+                board.redo()
+            elif event.key == pygame.K_r:
+                board.reset()
+            elif event.key == pygame.K_PAGEDOWN:
+                change_level(1)
+            elif event.key == pygame.K_PAGEUP:
+                change_level(-1)
+            elif event.key == pygame.K_F5:
+                board.save_replay(REPLAY_PATH)
+                print(f"Replay saved to {REPLAY_PATH}")
+            elif event.key == pygame.K_F9:
+                try:
+                    board.load_replay(REPLAY_PATH)
+                except (OSError, ValueError) as error:
+                    print(f"Could not load replay: {error}")
+        elif event.type == pygame.VIDEOEXPOSE:
+            renderer.invalidate()
+
+    renderer.draw(screen)
+
+    if board.is_solved():
         print("You win!")
-        pygame.quit()
-        sys.exit()
+        if not change_level(1):
+            pygame.quit()
+            sys.exit()
 
     clock.tick(60)
-
-    pygame.display.flip()
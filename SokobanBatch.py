@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import SokobanSolver
+from SokobanLevels import LevelPack
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Results are JSON lines, one per finished level, appended and flushed as
+# levels finish so an interrupted run loses at most the levels in flight.
+# Level numbers count from 1 as in Sokoban.py --level. A level whose worker
+# raises is recorded with an 'error: ...' status so a resumed run does not
+# try it again.
+
+DEFAULT_MAX_NODES = 200000
+DEFAULT_TIME_LIMIT = 10.0
+
+_worker_pack = None
+
+def peak_rss_kb():
+    # High-water mark of the worker process (kilobytes on Linux). Workers
+    # are reused, so it is exact per level only with --fresh-workers.
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def solve_level(path, number, method, max_nodes, time_limit):
+    global _worker_pack
+    if _worker_pack is None or _worker_pack.path != path:
+        _worker_pack = LevelPack(path)
+    try:
+        level = SokobanSolver.Level.from_xsb(_worker_pack.lines(number - 1))
+    except ValueError as error:
+        return {'level': number, 'status': f"invalid: {error}"}
+    solution, stats = SokobanSolver.solve(level, method, max_nodes, time_limit)
+    result = {'level': number, 'title': _worker_pack.title(number - 1)}
+    result.update(stats)
+    result['peak_rss_kb'] = peak_rss_kb()
+    result['solution'] = solution
+    return result
+
+def read_results(path):
+    # Returns the results recorded so far and the byte length of the
+    # complete lines, so a line cut off by an interruption can be dropped.
+    results = {}
+    good_length = 0
+    try:
+        with open(path, 'rb') as results_file:
+            for line in results_file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    break
+                results[result['level']] = result
+                good_length += len(line)
+    except FileNotFoundError:
+        pass
+    return results, good_length
+
+def summarize(results, elapsed=None, finished=0):
+    counts = {}
+    nodes = seconds = 0
+    for result in results.values():
+        status = result['status']
+        counts[status] = counts.get(status, 0) + 1
+        nodes += result.get('nodes', 0)
+        seconds += result.get('seconds', 0)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    summary = f"{len(results)} levels: {summary}; {nodes} nodes, {nodes / max(seconds, 1e-9):.0f} nodes/s per worker"
+    if elapsed:
+        # Only levels solved by this run count towards the rate; ones read
+        # back from an earlier run took no time here.
+        summary += f"; {finished} this run, {finished / elapsed:.1f} levels/s"
+    return summary
+
+def run_batch(pack_path, output, workers=None, method='astar', max_nodes=DEFAULT_MAX_NODES,
+              time_limit=DEFAULT_TIME_LIMIT, fresh_workers=False):
+    workers = workers or os.cpu_count() or 1
+    with LevelPack(pack_path) as pack:
+        total = len(pack)
+    results, good_length = read_results(output)
+    todo = [number for number in range(1, total + 1) if number not in results]
+    if results:
+        print(f"resuming: {len(results)} of {total} levels already in {output}")
+
+    pool_options = {'max_tasks_per_child': 1} if fresh_workers else {}
+    queue = deque(todo)
+    # Levels that were in flight when a worker died. The pool cannot tell
+    # which one killed it, so they are run again one at a time and only the
+    # one that breaks the pool on its own is recorded as an error.
+    suspects = deque()
+    isolating = False
+    start = time.perf_counter()
+    finished = 0
+    pending = {}
+    executor = ProcessPoolExecutor(max_workers=workers, **pool_options)
+    try:
+        with open(output, 'ab') as results_file:
+            results_file.truncate(good_length)
+            while queue or suspects or pending:
+                # Only a couple of levels per worker are queued at a time, so
+                # the results file stays close to what has actually been
+                # solved.
+                if suspects:
+                    if not pending:
+                        number = suspects.popleft()
+                        pending[executor.submit(solve_level, pack_path, number, method, max_nodes, time_limit)] = number
+                        isolating = True
+                else:
+                    while queue and len(pending) < 2 * workers:
+                        number = queue.popleft()
+                        pending[executor.submit(solve_level, pack_path, number, method, max_nodes, time_limit)] = number
+                done = wait(pending, return_when=FIRST_COMPLETED)[0]
+                broken = []
+                for future in done:
+                    number = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken.append(number)
+                        continue
+                    except Exception as error:
+                        result = {'level': number, 'status': f"error: {type(error).__name__}: {error}"}
+                    results[result['level']] = result
+                    results_file.write(json.dumps(result).encode() + b'\n')
+                    finished += 1
+                if broken:
+                    broken.extend(pending.values())
+                    pending.clear()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=workers, **pool_options)
+                    if isolating:
+                        result = {'level': broken[0], 'status': "error: worker process died"}
+                        results[result['level']] = result
+                        results_file.write(json.dumps(result).encode() + b'\n')
+                        finished += 1
+                    else:
+                        suspects.extend(broken)
+                isolating = False
+                results_file.flush()
+                elapsed = time.perf_counter() - start
+                print(f"\r{len(results)}/{total} levels, {finished / elapsed:.1f} levels/s", end='', flush=True)
+    finally:
+        executor.shutdown(cancel_futures=True)
+    print()
+    return results, time.perf_counter() - start, finished
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve every level of a Sokoban pack in parallel.")
+    parser.add_argument('pack')
+    parser.add_argument('--output', default=None, help="results file (default: <pack>.results.jsonl)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--method', choices=('astar', 'ida'), default='astar')
+    parser.add_argument('--max-nodes', type=int, default=DEFAULT_MAX_NODES, help="per level")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help="seconds per level")
+    parser.add_argument('--fresh-workers', action='store_true',
+                        help="one process per level, so peak memory is measured per level")
+    parser.add_argument('--summary', action='store_true', help="summarize an existing results file and exit")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.pack)[0] + '.results.jsonl'
+    if args.summary:
+        print(summarize(read_results(output)[0]))
+        return
+    results, elapsed, finished = run_batch(args.pack, output, args.workers, args.method, args.max_nodes,
+                                           args.time_limit, args.fresh_workers)
+    print(summarize(results, elapsed, finished))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# Moves are coded as a direction (0-3, in LURD order) plus PUSH_FLAG when
+# the move pushed a box.
+DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1))
+LURD = 'lurd'
+PUSH_FLAG = 4
+
+class MoveHistory:
+    # Undo/redo log packed two moves to a byte (one per nibble), so a
+    # 100,000-move session takes about 50 KB. Undoing only moves the cursor
+    # back; recording a new move drops whatever could have been redone.
+    def __init__(self):
+        self.data = bytearray()
+        self.length = 0
+        self.top = 0
+
+    def __len__(self):
+        return self.length
+
+    def get(self, index):
+        byte = self.data[index >> 1]
+        return byte >> 4 if index & 1 else byte & 0x0F
+
+    def set(self, index, code):
+        if index >> 1 == len(self.data):
+            self.data.append(0)
+        byte = self.data[index >> 1]
+        if index & 1:
+            self.data[index >> 1] = (byte & 0x0F) | (code << 4)
+        else:
+            self.data[index >> 1] = (byte & 0xF0) | code
+
+    def record(self, code):
+        self.set(self.length, code)
+        self.length += 1
+        self.top = self.length
+        # Keep the buffer no longer than the moves it holds once a redo
+        # branch has been cut off.
+        del self.data[(self.top + 1) >> 1:]
+
+    def undo(self):
+        if not self.length:
+            return None
+        self.length -= 1
+        return self.get(self.length)
+
+    def redo(self):
+        if self.length == self.top:
+            return None
+        code = self.get(self.length)
+        self.length += 1
+        return code
+
+    def clear(self):
+        self.data = bytearray()
+        self.length = self.top = 0
+
+    def codes(self):
+        return [self.get(index) for index in range(self.length)]
+
+def to_lurd(codes):
+    return ''.join(LURD[code & 3].upper() if code & PUSH_FLAG else LURD[code & 3] for code in codes)
+
+class Board:
+    # Level state for play. Walls, targets and boxes are each a bytearray
+    # bitmap with one byte per cell (index y * width + x), so every check a
+    # move needs is a single lookup; boxes are also kept in a set for
+    # drawing. The number of boxes on targets is updated on every push, so
+    # the win check does not rescan anything.
+    def __init__(self, rows, boxes, targets, player):
+        self.width = max(len(row) for row in rows)
+        self.height = len(rows)
+        size = self.width * self.height
+        self.walls = bytearray(size)
+        for y, row in enumerate(rows):
+            for x in range(self.width):
+                if x >= len(row) or row[x] == '#':
+                    self.walls[y * self.width + x] = 1
+        self.targets = bytearray(size)
+        self.target_positions = [tuple(target) for target in targets]
+        for target in self.target_positions:
+            self.targets[self.index(target)] = 1
+        self.box_map = bytearray(size)
+        self.boxes = set()
+        self.boxes_on_target = 0
+        for box in boxes:
+            self.add_box(self.index(box))
+        self.player = tuple(player)
+        self.start_boxes = set(self.boxes)
+        self.start_player = self.player
+        self.history = MoveHistory()
+
+    @classmethod
+    def from_xsb(cls, lines):
+        # One level in the usual notation: '#' wall, '$' box, '.' target,
+        # '*' box on target, '@' player, '+' player on target.
+        rows = []
+        boxes = []
+        targets = []
+        player = None
+        for y, line in enumerate(lines):
+            line = line.rstrip('\r\n')
+            rows.append(''.join('#' if symbol == '#' else ' ' for symbol in line))
+            for x, symbol in enumerate(line):
+                if symbol in '$*':
+                    boxes.append((x, y))
+                if symbol in '.*+':
+                    targets.append((x, y))
+                if symbol in '@+':
+                    player = (x, y)
+        if player is None:
+            raise ValueError("level has no player")
+        return cls(rows, boxes, targets, player)
+
+    def index(self, position):
+        x, y = position
+        return y * self.width + x
+
+    def position(self, index):
+        y, x = divmod(index, self.width)
+        return (x, y)
+
+    def in_bounds(self, position):
+        x, y = position
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, position):
+        return not self.in_bounds(position) or self.walls[self.index(position)] == 1
+
+    def has_box(self, position):
+        return self.in_bounds(position) and self.box_map[self.index(position)] == 1
+
+    def is_target(self, position):
+        return self.in_bounds(position) and self.targets[self.index(position)] == 1
+
+    def add_box(self, index):
+        self.box_map[index] = 1
+        self.boxes.add(index)
+        self.boxes_on_target += self.targets[index]
+
+    def remove_box(self, index):
+        self.box_map[index] = 0
+        self.boxes.discard(index)
+        self.boxes_on_target -= self.targets[index]
+
+    def move(self, dx, dy):
+        # Walks or pushes one step and records it. Returns (moved, pushed).
+        moved, pushed = self.step(dx, dy)
+        if moved:
+            self.history.record(DIRECTIONS.index((dx, dy)) | (PUSH_FLAG if pushed else 0))
+        return moved, pushed
+
+    def step(self, dx, dy):
+        x, y = self.player
+        next_position = (x + dx, y + dy)
+        if self.is_wall(next_position):
+            return False, False
+        if not self.has_box(next_position):
+            self.player = next_position
+            return True, False
+        beyond = (x + 2 * dx, y + 2 * dy)
+        if self.is_wall(beyond) or self.has_box(beyond):
+            return False, False
+        self.remove_box(self.index(next_position))
+        self.add_box(self.index(beyond))
+        self.player = next_position
+        return True, True
+
+    @property
+    def box_positions(self):
+        return [self.position(index) for index in self.boxes]
+
+    def is_solved(self):
+        return self.boxes_on_target == len(self.boxes)
+
+    def undo(self):
+        code = self.history.undo()
+        if code is None:
+            return False
+        dx, dy = DIRECTIONS[code & 3]
+        x, y = self.player
+        if code & PUSH_FLAG:
+            self.remove_box(self.index((x + dx, y + dy)))
+            self.add_box(self.index((x, y)))
+        self.player = (x - dx, y - dy)
+        return True
+
+    def redo(self):
+        code = self.history.redo()
+        if code is None:
+            return False
+        self.step(*DIRECTIONS[code & 3])
+        return True
+
+    def set_boxes(self, indices):
+        for index in list(self.boxes):
+            self.remove_box(index)
+        for index in indices:
+            self.add_box(index)
+
+    def reset(self):
+        self.set_boxes(self.start_boxes)
+        self.player = self.start_player
+        self.history.clear()
+
+    def lurd(self):
+        return to_lurd(self.history.codes())
+
+    def play_lurd(self, moves):
+        # Plays a LURD string from the current position. Letter case must
+        # match whether each move really pushes a box.
+        for number, letter in enumerate(moves, 1):
+            direction = LURD.find(letter.lower())
+            if direction < 0:
+                if letter.isspace():
+                    continue
+                raise ValueError(f"move {number}: {letter!r} is not a LURD move")
+            moved, pushed = self.move(*DIRECTIONS[direction])
+            if not moved or pushed != letter.isupper():
+                raise ValueError(f"move {number}: {letter!r} does not fit the position")
+
+    def save_replay(self, path):
+        with open(path, 'w') as replay_file:
+            replay_file.write(self.lurd() + '\n')
+
+    def load_replay(self, path):
+        # The replay is played from the start position; if any move does not
+        # fit, the board and its history are put back as they were.
+        with open(path) as replay_file:
+            moves = replay_file.read()
+        boxes, player, history = set(self.boxes), self.player, self.history
+        self.history = MoveHistory()
+        self.reset()
+        try:
+            self.play_lurd(moves)
+        except ValueError:
+            self.set_boxes(boxes)
+            self.player = player
+            self.history = history
+            raise
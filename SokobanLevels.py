@@ -0,0 +1,60 @@
+import mmap
+import re
+from array import array
+
+from SokobanBoard import Board
+
+# A level is any run of lines made only of map symbols and containing a
+# wall; comments, blank lines and "Title:" lines fall between levels.
+LEVEL_BLOCK = re.compile(rb'(?m)^(?:[ #$.*@+_-]*#[ #$.*@+_-]*(?:\r?\n|\Z))+')
+
+class LevelPack:
+    # A level-pack file left on disk behind a memory map. Opening it finds
+    # where each level starts and ends with one regex pass over the bytes
+    # and nothing more, so a pack with thousands of levels opens at once;
+    # a level is only decoded and parsed when it is asked for.
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        if self.file.seek(0, 2):
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.map = b''
+        self.starts = array('Q')
+        self.ends = array('Q')
+        for match in LEVEL_BLOCK.finditer(self.map):
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lines(self, number):
+        # number counts from 0.
+        text = self.map[self.starts[number]:self.ends[number]].decode('utf-8', errors='replace')
+        return text.splitlines()
+
+    def title(self, number):
+        following = self.starts[number + 1] if number + 1 < len(self) else len(self.map)
+        for line in self.map[self.ends[number]:following].splitlines():
+            line = line.strip()
+            if line.startswith(b'Title:'):
+                return line[len(b'Title:'):].strip().decode('utf-8', errors='replace')
+        return None
+
+    def board(self, number):
+        return Board.from_xsb(self.lines(number))
+
+    def __getitem__(self, number):
+        return self.board(number)
@@ -0,0 +1,63 @@
+import pygame
+
+class BoardRenderer:
+    # Walls, floor, margins and targets never move, so they are drawn once
+    # into a static surface. After the first frame only the cells whose box
+    # or player changed are restored from that surface, redrawn and sent to
+    # the display.
+    def __init__(self, board, cell_size, margin, colors):
+        self.board = board
+        self.cell_size = cell_size
+        self.margin = margin
+        self.colors = colors
+        self.size = (board.width * (cell_size + margin) + margin, board.height * (cell_size + margin) + margin)
+        self.background = self.render_background()
+        self.drawn_boxes = None
+        self.drawn_player = None
+
+    def cell_rect(self, position):
+        pitch = self.margin + self.cell_size
+        return pygame.Rect(pitch * position[0] + self.margin, pitch * position[1] + self.margin,
+                           self.cell_size, self.cell_size)
+
+    def render_background(self):
+        board = self.board
+        background = pygame.Surface(self.size)
+        background.fill(self.colors['margin'])
+        for y in range(board.height):
+            for x in range(board.width):
+                color = self.colors['wall'] if board.is_wall((x, y)) else self.colors['floor']
+                background.fill(color, self.cell_rect((x, y)))
+        for target in board.target_positions:
+            background.fill(self.colors['target'], self.cell_rect(target))
+        return background
+
+    def invalidate(self):
+        self.drawn_boxes = None
+
+    def draw_cell(self, screen, position):
+        rect = self.cell_rect(position)
+        screen.blit(self.background, rect, rect)
+        if self.board.has_box(position):
+            screen.fill(self.colors['box'], rect)
+        if position == self.board.player:
+            pygame.draw.circle(screen, self.colors['player'], rect.center, self.cell_size // 2)
+        return rect
+
+    def draw(self, screen):
+        board = self.board
+        if self.drawn_boxes is None:
+            screen.blit(self.background, (0, 0))
+            for position in board.box_positions:
+                self.draw_cell(screen, position)
+            self.draw_cell(screen, board.player)
+            pygame.display.flip()
+        else:
+            changed = {board.position(index) for index in self.drawn_boxes ^ board.boxes}
+            if board.player != self.drawn_player:
+                changed.update((self.drawn_player, board.player))
+            if not changed:
+                return
+            pygame.display.update([self.draw_cell(screen, position) for position in changed])
+        self.drawn_boxes = set(board.boxes)
+        self.drawn_player = board.player
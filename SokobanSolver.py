@@ -0,0 +1,460 @@
+import argparse
+import heapq
+import random
+import time
+from array import array
+from collections import deque
+
+from SokobanLevels import LevelPack
+
+# Level files use the usual XSB symbols; '-' and '_' also mean floor.
+WALL_SYMBOL = '#'
+BOX_SYMBOLS = '$*'
+TARGET_SYMBOLS = '.*+'
+PLAYER_SYMBOLS = '@+'
+
+INFINITY = float('inf')
+
+class SearchLimit(Exception):
+    pass
+
+class Level:
+    # Positions are (x, y) as in Sokoban.py. Internally cells are numbered
+    # y * stride + x over a grid with a one-cell wall border, so the four
+    # neighbours of a cell are always +/- 1 and +/- stride.
+    def __init__(self, rows, boxes, targets, player, title=None):
+        self.title = title
+        self.width = max(len(row) for row in rows)
+        self.height = len(rows)
+        self.stride = self.width + 2
+        self.walls = bytearray([1]) * (self.stride * (self.height + 2))
+        for y, row in enumerate(rows):
+            for x, symbol in enumerate(row):
+                if symbol != WALL_SYMBOL:
+                    self.walls[self.index((x, y))] = 0
+        self.boxes = frozenset(self.index(box) for box in boxes)
+        self.targets = frozenset(self.index(target) for target in targets)
+        self.player = self.index(player)
+        if len(self.boxes) > len(self.targets):
+            raise ValueError("level has more boxes than targets")
+        # Floor the player can never reach (outside the outer wall, say) is
+        # as good as wall for every purpose here.
+        inside = bytearray(len(self.walls))
+        inside[self.player] = 1
+        queue = deque([self.player])
+        while queue:
+            cell = queue.popleft()
+            for neighbor in (cell - self.stride, cell + self.stride, cell - 1, cell + 1):
+                if not self.walls[neighbor] and not inside[neighbor]:
+                    inside[neighbor] = 1
+                    queue.append(neighbor)
+        for cell in range(len(self.walls)):
+            if not inside[cell]:
+                self.walls[cell] = 1
+
+    @classmethod
+    def from_xsb(cls, lines, title=None):
+        rows = []
+        boxes = []
+        targets = []
+        player = None
+        for y, line in enumerate(lines):
+            row = []
+            for x, symbol in enumerate(line.rstrip('\r\n')):
+                if symbol in BOX_SYMBOLS:
+                    boxes.append((x, y))
+                if symbol in TARGET_SYMBOLS:
+                    targets.append((x, y))
+                if symbol in PLAYER_SYMBOLS:
+                    player = (x, y)
+                row.append(WALL_SYMBOL if symbol == WALL_SYMBOL else ' ')
+            rows.append(''.join(row))
+        if player is None:
+            raise ValueError("level has no player")
+        return cls(rows, boxes, targets, player, title)
+
+    def index(self, position):
+        x, y = position
+        return (y + 1) * self.stride + x + 1
+
+    def position(self, index):
+        y, x = divmod(index, self.stride)
+        return (x - 1, y - 1)
+
+def min_cost_assignment(costs, columns):
+    # Hungarian algorithm with potentials: the cheapest way to give every
+    # row (box) its own column (target), O(rows^2 * columns).
+    rows = len(costs)
+    u = [0] * (rows + 1)
+    v = [0] * (columns + 1)
+    match = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        match[0] = row
+        column = 0
+        min_slack = [INFINITY] * (columns + 1)
+        used = [False] * (columns + 1)
+        while match[column]:
+            used[column] = True
+            current_row = match[column]
+            current_costs = costs[current_row - 1]
+            delta = INFINITY
+            next_column = 0
+            for candidate in range(1, columns + 1):
+                if not used[candidate]:
+                    slack = current_costs[candidate - 1] - u[current_row] - v[candidate]
+                    if slack < min_slack[candidate]:
+                        min_slack[candidate] = slack
+                        way[candidate] = column
+                    if min_slack[candidate] < delta:
+                        delta = min_slack[candidate]
+                        next_column = candidate
+            if delta == INFINITY:
+                return INFINITY
+            for candidate in range(columns + 1):
+                if used[candidate]:
+                    u[match[candidate]] += delta
+                    v[candidate] -= delta
+                else:
+                    min_slack[candidate] -= delta
+            column = next_column
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+    return -v[0]
+
+class Solver:
+    # Searches over pushes rather than single steps. A state is the set of
+    # box cells plus the region the player can walk to, named by its lowest
+    # cell, and is stored in the closed set under a Zobrist hash that is
+    # updated with two XORs per push.
+    def __init__(self, level, seed=0):
+        self.level = level
+        self.walls = level.walls
+        self.stride = level.stride
+        self.directions = (-1, -self.stride, 1, self.stride)
+        self.letters = {-1: 'l', -self.stride: 'u', 1: 'r', self.stride: 'd'}
+        self.targets = level.targets
+        self.target_list = sorted(level.targets)
+        self.push_distances = [self.pull_distances(target) for target in self.target_list]
+        # A box on a square no target can be reached from is lost for good.
+        self.dead = bytearray(1 if wall else 0 for wall in self.walls)
+        for cell in range(len(self.walls)):
+            if not self.walls[cell] and all(distances[cell] < 0 for distances in self.push_distances):
+                self.dead[cell] = 1
+        rng = random.Random(seed)
+        self.box_keys = [rng.getrandbits(64) for _ in self.walls]
+        self.player_keys = [rng.getrandbits(64) for _ in self.walls]
+        self.marks = array('I', [0]) * len(self.walls)
+        self.stamp = 0
+        self.nodes = 0
+        self.generated = 0
+        # Largest closed set / transposition table held, which is what the
+        # search's memory grows with.
+        self.states = 0
+        self.max_nodes = None
+        self.deadline = None
+
+    def pull_distances(self, target):
+        # Pushes needed to bring a box from each cell to target on an
+        # otherwise empty board, found by pulling it backwards from target.
+        distances = array('i', [-1]) * len(self.walls)
+        distances[target] = 0
+        queue = deque([target])
+        walls = self.walls
+        while queue:
+            cell = queue.popleft()
+            for step in self.directions:
+                previous = cell - step
+                if not walls[previous] and not walls[previous - step] and distances[previous] < 0:
+                    distances[previous] = distances[cell] + 1
+                    queue.append(previous)
+        return distances
+
+    def reachable(self, player, boxes):
+        # Marks the player's region with a fresh stamp and returns its lowest
+        # cell, which names the region in the state key.
+        self.stamp += 1
+        stamp = self.stamp
+        marks = self.marks
+        walls = self.walls
+        marks[player] = stamp
+        lowest = player
+        stack = [player]
+        while stack:
+            cell = stack.pop()
+            for neighbor in (cell - self.stride, cell + self.stride, cell - 1, cell + 1):
+                if marks[neighbor] != stamp and not walls[neighbor] and neighbor not in boxes:
+                    marks[neighbor] = stamp
+                    if neighbor < lowest:
+                        lowest = neighbor
+                    stack.append(neighbor)
+        return lowest
+
+    def lower_bound(self, boxes):
+        push_distances = self.push_distances
+        costs = []
+        for box in boxes:
+            row = []
+            for distances in push_distances:
+                distance = distances[box]
+                row.append(INFINITY if distance < 0 else distance)
+            costs.append(row)
+        return min_cost_assignment(costs, len(push_distances))
+
+    def is_frozen(self, box, vertical, boxes, checked):
+        # A box cannot move along an axis when a wall is beside it, when both
+        # sides are dead squares, or when a box beside it is itself stuck on
+        # the other axis (with this box counted as a wall).
+        step = self.stride if vertical else 1
+        before, after = box - step, box + step
+        if self.walls[before] or self.walls[after]:
+            return True
+        if self.dead[before] and self.dead[after]:
+            return True
+        checked.add(box)
+        for neighbor in (before, after):
+            if neighbor in checked:
+                return True
+            if neighbor in boxes and self.is_frozen(neighbor, not vertical, boxes, checked):
+                return True
+        return False
+
+    def is_freeze_deadlock(self, box, boxes):
+        if box in self.targets:
+            return False
+        return self.is_frozen(box, False, boxes, set()) and self.is_frozen(box, True, boxes, set())
+
+    def check_limits(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchLimit("node limit")
+        if self.deadline is not None and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchLimit("time limit")
+
+    def pushes(self, boxes, box_hash):
+        # Every push available from the current player region (which must
+        # already be marked), as (box, step, new boxes, new box hash).
+        marks = self.marks
+        stamp = self.stamp
+        walls = self.walls
+        dead = self.dead
+        for box in boxes:
+            for step in self.directions:
+                destination = box + step
+                if marks[box - step] != stamp or walls[destination] or dead[destination] or destination in boxes:
+                    continue
+                new_boxes = boxes - {box} | {destination}
+                if self.is_freeze_deadlock(destination, new_boxes):
+                    continue
+                self.generated += 1
+                yield box, step, new_boxes, box_hash ^ self.box_keys[box] ^ self.box_keys[destination]
+
+    def start_state(self):
+        boxes = self.level.boxes
+        box_hash = 0
+        for box in boxes:
+            box_hash ^= self.box_keys[box]
+        return boxes, box_hash
+
+    def is_solved(self, boxes):
+        return boxes <= self.targets
+
+    def astar(self):
+        boxes, box_hash = self.start_state()
+        region = self.reachable(self.level.player, boxes)
+        key = box_hash ^ self.player_keys[region]
+        bound = self.lower_bound(boxes)
+        if bound == INFINITY:
+            return None
+        parents = {key: None}
+        costs = {key: 0}
+        counter = 0
+        # Ties on f go to the state with more pushes behind it, which is
+        # closer to done when the bound is tight.
+        frontier = [(bound, 0, counter, key, boxes, box_hash, self.level.player)]
+        while frontier:
+            _, negative_cost, _, key, boxes, box_hash, player = heapq.heappop(frontier)
+            cost = -negative_cost
+            if costs[key] < cost:
+                continue
+            if self.is_solved(boxes):
+                return self.trace_pushes(parents, key)
+            self.check_limits()
+            self.reachable(player, boxes)
+            children = list(self.pushes(boxes, box_hash))
+            for box, step, new_boxes, new_box_hash in children:
+                region = self.reachable(box, new_boxes)
+                new_key = new_box_hash ^ self.player_keys[region]
+                if costs.get(new_key, INFINITY) <= cost + 1:
+                    continue
+                bound = self.lower_bound(new_boxes)
+                if bound == INFINITY:
+                    continue
+                costs[new_key] = cost + 1
+                parents[new_key] = (key, box, step)
+                self.states = len(costs)
+                counter += 1
+                heapq.heappush(frontier, (cost + 1 + bound, -cost - 1, counter, new_key,
+                                          new_boxes, new_box_hash, box))
+        return None
+
+    def trace_pushes(self, parents, key):
+        pushes = []
+        while parents[key] is not None:
+            key, box, step = parents[key]
+            pushes.append((box, step))
+        pushes.reverse()
+        return pushes
+
+    def ida(self):
+        # Iterative deepening on f = pushes + bound. The transposition table
+        # keeps the fewest pushes each state was reached with, so a state is
+        # only searched again when reached more cheaply.
+        boxes, box_hash = self.start_state()
+        bound = self.lower_bound(boxes)
+        if bound == INFINITY:
+            return None
+        threshold = bound
+        path = []
+        while True:
+            seen = {}
+            result = self.ida_search(boxes, box_hash, self.level.player, 0, threshold, path, seen)
+            if result is True:
+                return path
+            if result == INFINITY:
+                return None
+            threshold = result
+
+    def ida_search(self, boxes, box_hash, player, cost, threshold, path, seen):
+        region = self.reachable(player, boxes)
+        key = box_hash ^ self.player_keys[region]
+        if seen.get(key, INFINITY) <= cost:
+            return INFINITY
+        seen[key] = cost
+        self.states = max(self.states, len(seen))
+        bound = self.lower_bound(boxes)
+        if cost + bound > threshold:
+            return cost + bound
+        if self.is_solved(boxes):
+            return True
+        self.check_limits()
+        smallest = INFINITY
+        # The region marks are overwritten by the recursion, so collect the
+        # pushes before descending.
+        for box, step, new_boxes, new_box_hash in list(self.pushes(boxes, box_hash)):
+            path.append((box, step))
+            result = self.ida_search(new_boxes, new_box_hash, box, cost + 1, threshold, path, seen)
+            if result is True:
+                return True
+            path.pop()
+            smallest = min(smallest, result)
+        return smallest
+
+    def walk(self, start, goal, boxes):
+        # Shortest walk for the player as a string of lowercase LURD moves.
+        if start == goal:
+            return ''
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for step in self.directions:
+                neighbor = cell + step
+                if neighbor in parents or self.walls[neighbor] or neighbor in boxes:
+                    continue
+                parents[neighbor] = cell
+                if neighbor == goal:
+                    moves = []
+                    while parents[neighbor] is not None:
+                        moves.append(self.letters[neighbor - parents[neighbor]])
+                        neighbor = parents[neighbor]
+                    return ''.join(reversed(moves))
+                queue.append(neighbor)
+        raise ValueError("push is not reachable")
+
+    def to_lurd(self, pushes):
+        boxes = set(self.level.boxes)
+        player = self.level.player
+        moves = []
+        for box, step in pushes:
+            moves.append(self.walk(player, box - step, boxes))
+            moves.append(self.letters[step].upper())
+            boxes.remove(box)
+            boxes.add(box + step)
+            player = box
+        return ''.join(moves)
+
+def solve(level, method='astar', max_nodes=None, time_limit=None):
+    # Returns (solution, stats): the solution in LURD notation (None when
+    # there is none or a limit was hit) and a dict of search statistics.
+    solver = Solver(level)
+    solver.max_nodes = max_nodes
+    start = time.perf_counter()
+    if time_limit is not None:
+        solver.deadline = start + time_limit
+    status = 'solved'
+    try:
+        pushes = solver.astar() if method == 'astar' else solver.ida()
+    except SearchLimit as limit:
+        pushes = None
+        status = str(limit)
+    elapsed = time.perf_counter() - start
+    if pushes is None and status == 'solved':
+        status = 'unsolvable'
+    solution = None if pushes is None else solver.to_lurd(pushes)
+    stats = {
+        'status': status,
+        'nodes': solver.nodes,
+        'generated': solver.generated,
+        'seconds': elapsed,
+        'nodes_per_second': solver.nodes / elapsed if elapsed > 0 else 0.0,
+        'pushes': None if pushes is None else len(pushes),
+        'moves': None if solution is None else len(solution),
+        'states': solver.states,
+    }
+    return solution, stats
+
+def format_stats(name, stats):
+    if stats['status'] == 'solved':
+        outcome = f"solved in {stats['pushes']} pushes / {stats['moves']} moves"
+    else:
+        outcome = stats['status']
+    return (f"{name}: {outcome}, {stats['nodes']} nodes in {stats['seconds']:.2f} s "
+            f"({stats['nodes_per_second']:.0f} nodes/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve Sokoban levels from an XSB file.")
+    parser.add_argument('levels')
+    parser.add_argument('--level', type=int, default=None, help="solve only this level (1-based)")
+    parser.add_argument('--method', choices=('astar', 'ida'), default='astar')
+    parser.add_argument('--max-nodes', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=None, help="seconds per level")
+    parser.add_argument('--show-solution', action='store_true')
+    args = parser.parse_args()
+
+    with LevelPack(args.levels) as pack:
+        if args.level is not None and not 1 <= args.level <= len(pack):
+            parser.error(f"--level must be between 1 and {len(pack)}")
+        numbers = range(1, len(pack) + 1) if args.level is None else [args.level]
+        total_nodes = total_seconds = 0
+        for number in numbers:
+            title = pack.title(number - 1)
+            name = f"level {number}" + (f" ({title})" if title else "")
+            try:
+                level = Level.from_xsb(pack.lines(number - 1), title)
+            except ValueError as error:
+                print(f"{name}: invalid: {error}")
+                continue
+            solution, stats = solve(level, args.method, args.max_nodes, args.time_limit)
+            total_nodes += stats['nodes']
+            total_seconds += stats['seconds']
+            print(format_stats(name, stats))
+            if args.show_solution and solution:
+                print(solution)
+    if total_seconds:
+        print(f"total: {total_nodes} nodes in {total_seconds:.2f} s ({total_nodes / total_seconds:.0f} nodes/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import time
+
+import AGameofTag
+
+def run_reproducibility_check(seed=4, width=120, height=80, bot_count=30, ticks=3000):
+    # Two headless runs with the same seed must end in the same state, tick
+    # for tick, however long the planner took on this machine.
+    checksums = []
+    for _ in range(2):
+        start = time.perf_counter()
+        game = AGameofTag.run_headless(ticks, seed, width, height, bot_count)
+        elapsed = time.perf_counter() - start
+        checksums.append((game.tick, game.checksum()))
+        print(f"seed {seed}: {game.tick} ticks in {elapsed:.2f}s, checksum {game.checksum():08x}")
+    assert checksums[0] == checksums[1], "seeded runs diverged"
+
+def run_far_bot_check(seed=1, size=1000, bot_count=500, ticks=1000):
+    # On a map too large for a full distance field, bots out of the chase
+    # radius must still close in on a player who stands still.
+    game = AGameofTag.Game(size, size, bot_count, seed)
+    far = [i for i, position in enumerate(game.bot_positions) if game.is_far_bot(position)]
+    before = [game.calculate_distance(position, game.player_position) for position in game.bot_positions]
+    start = time.perf_counter()
+    while game.tick < ticks and not game.step():
+        pass
+    elapsed = time.perf_counter() - start
+    after = [game.calculate_distance(position, game.player_position) for position in game.bot_positions]
+    closer = sum(after[i] < before[i] for i in far)
+    gained = sum(before[i] - after[i] for i in far)
+    moves = game.tick // AGameofTag.BOT_MOVE_TICKS
+    print(f"{size}x{size}, {bot_count} bots: {closer} of {len(far)} far bots closer after {moves} moves, "
+          f"{gained / max(len(far) * moves, 1):.2f} cells per move, {elapsed:.2f}s")
+    assert closer >= 0.95 * len(far), "far bots are not closing in"
+
+if __name__ == "__main__":
+    run_reproducibility_check()
+    print()
+    run_far_bot_check()
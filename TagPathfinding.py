@@ -0,0 +1,369 @@
+import heapq
+import time
+from array import array
+
+UNREACHABLE = -1
+
+STEP_DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+class DistanceField:
+    # Breadth-first distances from a single target cell to every open cell,
+    # stored in one flat array indexed by row * width + col. All bots chase
+    # the same target, so one reverse search per target move replaces a
+    # search per bot, and steering becomes a lookup of the four neighbours.
+    def __init__(self, width, height, walls, max_distance=None):
+        self.width = width
+        self.height = height
+        self.walls = walls
+        self.max_distance = max_distance
+        self.distances = array('i', [UNREACHABLE]) * (width * height)
+        self.reached = []
+        self.target = None
+
+    def update(self, target):
+        if target == self.target:
+            return False
+        self.target = target
+        self.recompute()
+        return True
+
+    def recompute(self):
+        width = self.width
+        cell_count = width * self.height
+        walls = self.walls
+        distances = self.distances
+        for index in self.reached:
+            distances[index] = UNREACHABLE
+
+        col, row = self.target
+        start = row * width + col
+        distances[start] = 0
+        reached = [start]
+        frontier = [start]
+        distance = 0
+        while frontier and (self.max_distance is None or distance < self.max_distance):
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                # Cells are marked when they are queued, so each one is
+                # queued at most once.
+                if index >= width:
+                    neighbor = index - width
+                    if distances[neighbor] == UNREACHABLE and not walls[neighbor]:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+                if index + width < cell_count:
+                    neighbor = index + width
+                    if distances[neighbor] == UNREACHABLE and not walls[neighbor]:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+                if index % width:
+                    neighbor = index - 1
+                    if distances[neighbor] == UNREACHABLE and not walls[neighbor]:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+                if (index + 1) % width:
+                    neighbor = index + 1
+                    if distances[neighbor] == UNREACHABLE and not walls[neighbor]:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            reached.extend(next_frontier)
+            frontier = next_frontier
+        self.reached = reached
+
+    def distance(self, position):
+        col, row = position
+        return self.distances[row * self.width + col]
+
+    def step_towards_target(self, position):
+        # Returns the direction of a neighbour one step closer to the target,
+        # or (0, 0) when the position is the target or was not reached.
+        col, row = position
+        distance = self.distances[row * self.width + col]
+        if distance <= 0:
+            return (0, 0)
+        for d_col, d_row in STEP_DIRECTIONS:
+            next_col = col + d_col
+            next_row = row + d_row
+            if 0 <= next_col < self.width and 0 <= next_row < self.height \
+                    and self.distances[next_row * self.width + next_col] == distance - 1:
+                return (d_col, d_row)
+        return (0, 0)
+
+class BlockField:
+    # Coarse distances for maps too large to search cell by cell. The map is
+    # cut into block_size squares, and two neighbouring blocks are linked
+    # when an open cell on one side of their shared edge faces an open cell
+    # on the other. A breadth-first search over blocks from the target's
+    # block then costs a few thousand steps even on a 1000x1000 map. Inside
+    # a block a bot follows a small distance field towards the edge it
+    # should cross next; those only depend on the walls, so each one is
+    # computed the first time a bot needs it and kept.
+    def __init__(self, width, height, walls, block_size=16):
+        self.width = width
+        self.height = height
+        self.walls = walls
+        self.block_size = block_size
+        self.blocks_wide = -(-width // block_size)
+        self.blocks_high = -(-height // block_size)
+        block_count = self.blocks_wide * self.blocks_high
+        # Bit n of links[block] is set when the block is linked to its
+        # neighbour in STEP_DIRECTIONS[n].
+        self.links = bytearray(block_count)
+        self.distances = array('i', [UNREACHABLE]) * block_count
+        self.exit_fields = {}
+        self.target_block = None
+        self.find_links()
+
+    def find_links(self):
+        width = self.width
+        walls = self.walls
+        size = self.block_size
+        links = self.links
+        for block_row in range(self.blocks_high):
+            rows = range(block_row * size, min((block_row + 1) * size, self.height))
+            for block_col in range(self.blocks_wide):
+                block = block_row * self.blocks_wide + block_col
+                cols = range(block_col * size, min((block_col + 1) * size, width))
+                col = cols[-1]
+                if col + 1 < width and any(not walls[row * width + col] and not walls[row * width + col + 1]
+                                           for row in rows):
+                    links[block] |= 8
+                    links[block + 1] |= 4
+                row = rows[-1]
+                if row + 1 < self.height and any(not walls[row * width + col] and not walls[(row + 1) * width + col]
+                                                 for col in cols):
+                    links[block] |= 2
+                    links[block + self.blocks_wide] |= 1
+
+    def block_of(self, position):
+        col, row = position
+        return row // self.block_size * self.blocks_wide + col // self.block_size
+
+    def update(self, target):
+        block = self.block_of(target)
+        if block == self.target_block:
+            return False
+        self.target_block = block
+        blocks_wide = self.blocks_wide
+        offsets = (-blocks_wide, blocks_wide, -1, 1)
+        links = self.links
+        distances = self.distances
+        for index in range(len(distances)):
+            distances[index] = UNREACHABLE
+        distances[block] = 0
+        frontier = [block]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for index in frontier:
+                for direction, offset in enumerate(offsets):
+                    neighbor = index + offset
+                    if links[index] >> direction & 1 and distances[neighbor] == UNREACHABLE:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return True
+
+    def exit_field(self, block, direction):
+        # Distances inside the block to the cells that can step straight
+        # across its edge in `direction`, indexed by the cell's offset in
+        # the block. Cells that cannot reach that edge without leaving the
+        # block stay UNREACHABLE.
+        key = block * 4 + direction
+        field = self.exit_fields.get(key)
+        if field is not None:
+            return field
+        width = self.width
+        walls = self.walls
+        size = self.block_size
+        first_col = block % self.blocks_wide * size
+        first_row = block // self.blocks_wide * size
+        cols = min(size, width - first_col)
+        rows = min(size, self.height - first_row)
+        d_col, d_row = STEP_DIRECTIONS[direction]
+        field = array('i', [UNREACHABLE]) * (size * size)
+        frontier = []
+        for row in range(rows):
+            for col in range(cols):
+                if not (d_col < 0 and col == 0 or d_col > 0 and col == cols - 1
+                        or d_row < 0 and row == 0 or d_row > 0 and row == rows - 1):
+                    continue
+                index = (first_row + row) * width + first_col + col
+                if not walls[index] and not walls[index + d_row * width + d_col]:
+                    field[row * size + col] = 0
+                    frontier.append((col, row))
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for col, row in frontier:
+                for step_col, step_row in STEP_DIRECTIONS:
+                    next_col = col + step_col
+                    next_row = row + step_row
+                    if 0 <= next_col < cols and 0 <= next_row < rows \
+                            and field[next_row * size + next_col] == UNREACHABLE \
+                            and not walls[(first_row + next_row) * width + first_col + next_col]:
+                        field[next_row * size + next_col] = distance
+                        next_frontier.append((next_col, next_row))
+            frontier = next_frontier
+        self.exit_fields[key] = field
+        return field
+
+    def step_towards_target(self, position):
+        # Returns the direction of a step towards the next block on the way
+        # to the target's block, or (0, 0) when the position is already in
+        # that block, the block was not reached, or the part of the block
+        # the position is in does not touch the edge to cross.
+        block = self.block_of(position)
+        distance = self.distances[block]
+        if distance <= 0:
+            return (0, 0)
+        offsets = (-self.blocks_wide, self.blocks_wide, -1, 1)
+        for direction, offset in enumerate(offsets):
+            if self.links[block] >> direction & 1 and self.distances[block + offset] == distance - 1:
+                break
+        field = self.exit_field(block, direction)
+        size = self.block_size
+        col = position[0] % size
+        row = position[1] % size
+        local_distance = field[row * size + col]
+        if local_distance == 0:
+            return STEP_DIRECTIONS[direction]
+        if local_distance == UNREACHABLE:
+            return (0, 0)
+        for d_col, d_row in STEP_DIRECTIONS:
+            next_col = col + d_col
+            next_row = row + d_row
+            if 0 <= next_col < size and 0 <= next_row < size \
+                    and field[next_row * size + next_col] == local_distance - 1:
+                return (d_col, d_row)
+        return (0, 0)
+
+class CooperativePlanner:
+    # Windowed cooperative A*: bots plan one after another through space and
+    # time, and each finished path is written into a reservation table so
+    # later bots route around it instead of walking into it. Bots nearest the
+    # target plan first. Searches stop at `horizon` steps, using the distance
+    # field as the (exact, obstacle-free) estimate of the rest of the way, and
+    # bots left unplanned when the time budget runs out get None so the
+    # caller can fall back to plain steering.
+    def __init__(self, width, height, horizon=8, time_budget_ms=None):
+        self.width = width
+        self.height = height
+        self.horizon = horizon
+        self.time_budget_ms = time_budget_ms
+        self.last_plan_ms = 0.0
+        self.last_planned = 0
+        self.last_expanded = 0
+        self.plan_count = 0
+        self.total_plan_ms = 0.0
+        self.max_plan_ms = 0.0
+        self.cut_short = 0
+
+    def plan(self, starts, distances, blocked=()):
+        # starts are cell indices and distances a DistanceField array; the
+        # goal is any cell at distance 1. Returns the next cell for each bot
+        # (its own cell to wait) or None where no plan was made.
+        start_time = time.perf_counter()
+        deadline = None if self.time_budget_ms is None else start_time + self.time_budget_ms / 1000
+        cell_count = self.width * self.height
+        horizon = self.horizon
+        # Reservations are t * cell_count + index for "someone is here at
+        # time t", plus (to, from, t) for moves, which rules out two bots
+        # swapping cells through each other.
+        reserved = set()
+        edges = set()
+        for index in blocked:
+            for t in range(horizon + 1):
+                reserved.add(t * cell_count + index)
+        # Every bot holds its cell for the first step until it has planned,
+        # so nobody plans into a bot that has not yet decided to leave.
+        for index in starts:
+            reserved.add(index)
+            reserved.add(cell_count + index)
+
+        order = sorted((distances[index], bot) for bot, index in enumerate(starts) if distances[index] > 0)
+        steps = [None] * len(starts)
+        self.last_expanded = 0
+        planned = 0
+        for _, bot in order:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            start = starts[bot]
+            reserved.discard(cell_count + start)
+            path = self.search(start, distances, reserved, edges, deadline)
+            if path is None:
+                reserved.add(cell_count + start)
+                continue
+            for t, index in enumerate(path):
+                reserved.add(t * cell_count + index)
+                if t:
+                    edges.add((path[t - 1], index, t))
+            for t in range(len(path), horizon + 1):
+                reserved.add(t * cell_count + path[-1])
+            steps[bot] = path[1] if len(path) > 1 else start
+            planned += 1
+
+        self.last_planned = planned
+        self.last_plan_ms = (time.perf_counter() - start_time) * 1000
+        self.plan_count += 1
+        self.total_plan_ms += self.last_plan_ms
+        self.max_plan_ms = max(self.max_plan_ms, self.last_plan_ms)
+        if planned < len(order):
+            self.cut_short += 1
+        return steps
+
+    def search(self, start, distances, reserved, edges, deadline):
+        width = self.width
+        cell_count = width * self.height
+        horizon = self.horizon
+        # Every action, waiting included, costs one step, so a state's cost
+        # is its time and the first time a state is queued is its best.
+        parents = {start: None}
+        frontier = [(distances[start], 0, start)]
+        expanded = 0
+        while frontier:
+            _, negative_t, index = heapq.heappop(frontier)
+            t = -negative_t
+            key = t * cell_count + index
+            if distances[index] == 1 or t == horizon:
+                self.last_expanded += expanded
+                path = []
+                while key is not None:
+                    path.append(key % cell_count)
+                    key = parents[key]
+                path.reverse()
+                return path
+
+            expanded += 1
+            if deadline is not None and not expanded & 255 and time.perf_counter() >= deadline:
+                self.last_expanded += expanded
+                return None
+
+            next_t = t + 1
+            base = next_t * cell_count
+            neighbors = [index]
+            if index >= width:
+                neighbors.append(index - width)
+            if index + width < cell_count:
+                neighbors.append(index + width)
+            if index % width:
+                neighbors.append(index - 1)
+            if (index + 1) % width:
+                neighbors.append(index + 1)
+            for neighbor in neighbors:
+                distance = distances[neighbor]
+                next_key = base + neighbor
+                # Walls and unreached cells have no distance, and the
+                # target's own cell is distance 0.
+                if distance <= 0 or next_key in reserved or next_key in parents:
+                    continue
+                if neighbor != index and (neighbor, index, next_t) in edges:
+                    continue
+                parents[next_key] = key
+                # Deeper states first among equal estimates.
+                heapq.heappush(frontier, (next_t + distance, -next_t, neighbor))
+        self.last_expanded += expanded
+        return None
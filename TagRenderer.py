@@ -0,0 +1,110 @@
+import pygame
+
+from TagWorld import CellType
+
+BACKGROUND_COLOR = (255, 255, 255)
+WALL_COLOR = (100, 100, 100)
+ENTITY_COLORS = {CellType.PLAYER: (0, 255, 0), CellType.BOT: (255, 0, 0)}
+PLAYER_KEY = 'player'
+
+class GridRenderer:
+    # Walls never change, so they are drawn once into a background surface.
+    # Each frame only the entities whose on-screen rect moved are erased (by
+    # copying the background back over their old rect) and redrawn, and only
+    # those rects are sent to the display.
+    def __init__(self, grid, cell_size):
+        self.grid = grid
+        self.cell_size = cell_size
+        self.background = self.render_background()
+        self.drawn = {}
+        self.needs_full_redraw = True
+
+    def render_background(self):
+        cell_size = self.cell_size
+        width = self.grid.width
+        background = pygame.Surface((width * cell_size, self.grid.height * cell_size))
+        background.fill(BACKGROUND_COLOR)
+        for index, cell_type in enumerate(self.grid.cells):
+            if cell_type == CellType.WALL:
+                row, col = divmod(index, width)
+                background.fill(WALL_COLOR, (col * cell_size, row * cell_size, cell_size, cell_size))
+        return background
+
+    def invalidate(self):
+        self.needs_full_redraw = True
+
+    def entity_rect(self, previous, current, alpha):
+        cell_size = self.cell_size
+        col = previous[0] + (current[0] - previous[0]) * alpha
+        row = previous[1] + (current[1] - previous[1]) * alpha
+        return (round(col * cell_size), round(row * cell_size), cell_size, cell_size)
+
+    def entity_rects(self, game, alpha):
+        # Bots are keyed by index and the player by PLAYER_KEY so a bot keeps
+        # its key however far it moves. Also returns which entities touch
+        # each cell; an entity's rect only ever covers its previous and
+        # current cells.
+        rects = {}
+        keys_by_cell = {}
+        for key, (previous, current) in enumerate(zip(game.previous_bot_positions, game.bot_positions)):
+            rects[key] = (CellType.BOT, self.entity_rect(previous, current, alpha))
+            keys_by_cell.setdefault(previous, []).append(key)
+            if current != previous:
+                keys_by_cell.setdefault(current, []).append(key)
+        previous, current = game.previous_player_position, game.player_position
+        rects[PLAYER_KEY] = (CellType.PLAYER, self.entity_rect(previous, current, alpha))
+        keys_by_cell.setdefault(previous, []).append(PLAYER_KEY)
+        if current != previous:
+            keys_by_cell.setdefault(current, []).append(PLAYER_KEY)
+        return rects, keys_by_cell
+
+    def covered_cells(self, rect):
+        cell_size = self.cell_size
+        x, y, width, height = rect
+        for row in range(y // cell_size, (y + height - 1) // cell_size + 1):
+            for col in range(x // cell_size, (x + width - 1) // cell_size + 1):
+                yield col, row
+
+    def draw(self, screen, game, alpha=1.0):
+        rects, keys_by_cell = self.entity_rects(game, alpha)
+        if self.needs_full_redraw:
+            screen.blit(self.background, (0, 0))
+            for cell_type, rect in rects.values():
+                screen.fill(ENTITY_COLORS[cell_type], rect)
+            pygame.display.flip()
+            self.drawn = rects
+            self.needs_full_redraw = False
+            return
+
+        drawn = self.drawn
+        changed = [key for key, value in rects.items() if drawn.get(key) != value]
+        stale = [key for key in drawn if key not in rects]
+        if not changed and not stale:
+            return
+
+        dirty = []
+        for key in changed + stale:
+            if key in drawn:
+                old_rect = drawn[key][1]
+                screen.blit(self.background, old_rect, old_rect)
+                dirty.append(old_rect)
+
+        # Erasing a moving entity can clip a neighbour that did not move, so
+        # repaint any such neighbour touching the cells an erased rect covered.
+        repaint = set()
+        for old_rect in dirty:
+            for cell in self.covered_cells(old_rect):
+                repaint.update(keys_by_cell.get(cell, ()))
+        repaint.difference_update(changed)
+        for key in repaint:
+            cell_type, rect = rects[key]
+            screen.fill(ENTITY_COLORS[cell_type], rect)
+            dirty.append(rect)
+
+        for key in changed:
+            cell_type, rect = rects[key]
+            screen.fill(ENTITY_COLORS[cell_type], rect)
+            dirty.append(rect)
+
+        self.drawn = rects
+        pygame.display.update(dirty)
@@ -0,0 +1,81 @@
+class CellType:
+    EMPTY = 0
+    WALL = 1
+    PLAYER = 2
+    BOT = 3
+
+class Direction:
+    UP = (0, -1)
+    DOWN = (0, 1)
+    LEFT = (-1, 0)
+    RIGHT = (1, 0)
+
+NEIGHBOR_DIRECTIONS = (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT)
+
+class Grid:
+    # Static terrain only (EMPTY or WALL), one byte per cell in row-major
+    # order. Moving entities live in a SpatialHash instead.
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+
+    def index(self, position):
+        col, row = position
+        return row * self.width + col
+
+    def is_valid(self, position):
+        col, row = position
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def is_wall(self, position):
+        return self.cells[self.index(position)] == CellType.WALL
+
+    def set_cell(self, position, cell_type):
+        self.cells[self.index(position)] = cell_type
+
+class SpatialHash:
+    # Exact cell occupancy keyed by position, for O(1) collision checks.
+    # Neighbour lookups only ever look at the four adjacent cells, so there
+    # is no coarser bucketing to keep up to date.
+    def __init__(self):
+        self.occupants = {}
+
+    def add(self, position, entity):
+        self.occupants[position] = entity
+
+    def remove(self, position):
+        del self.occupants[position]
+
+    def move(self, old_position, new_position):
+        self.occupants[new_position] = self.occupants.pop(old_position)
+
+    def occupant(self, position):
+        return self.occupants.get(position)
+
+    def is_occupied(self, position):
+        return position in self.occupants
+
+    def __len__(self):
+        return len(self.occupants)
+
+def generate_walls(grid, rng, density=0.2, max_segment=4):
+    # Scatters short horizontal and vertical wall segments until roughly
+    # `density` of the map is wall, which gives the same feel as the
+    # hand-made 10x10 level at any size.
+    target = int(grid.width * grid.height * density)
+    placed = 0
+    while placed < target:
+        d_col, d_row = rng.choice(((1, 0), (0, 1)))
+        length = rng.randint(1, max_segment)
+        col = rng.randrange(grid.width)
+        row = rng.randrange(grid.height)
+        for _ in range(length):
+            if not grid.is_valid((col, row)):
+                break
+            index = row * grid.width + col
+            if grid.cells[index] != CellType.WALL:
+                grid.cells[index] = CellType.WALL
+                placed += 1
+            col += d_col
+            row += d_row
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+import pygame
+
+MAX_TEXT_SURFACES = 256
+
+class TextCache:
+    # Rendered text surfaces keyed by (text, font name, size, color,
+    # antialias), kept in an LRU cache so each label is rendered once and
+    # then only blitted. Fonts are opened once per (name, size) and kept for
+    # as long as the cache lives.
+    def __init__(self, max_surfaces=MAX_TEXT_SURFACES):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def render(self, text, size, color, name=None, antialias=True):
+        key = (text, name, size, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = self.font(size, name).render(text, antialias, color)
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def blit(self, screen, text, size, color, center, name=None, antialias=True):
+        surface = self.render(text, size, color, name, antialias)
+        return screen.blit(surface, surface.get_rect(center=center))
+
+    def clear(self):
+        self.surfaces.clear()
@@ -0,0 +1,213 @@
+import math
+import os
+import random
+import time
+
+import TicTacToeEngine as engine
+import TicTacToeSolver
+from TicTacToeEngine import PLAYER_X, PLAYER_O, EMPTY, Board
+
+# The list-of-lists implementation the bot used before the bitboard engine,
+# kept here only as the baseline the benchmark measures against.
+
+BOARD_ROWS, BOARD_COLS = 3, 3
+
+def list_check_winner(board, player):
+    for row in range(BOARD_ROWS):
+        if all([board[row][col] == player for col in range(BOARD_COLS)]):
+            return True
+
+    for col in range(BOARD_COLS):
+        if all([board[row][col] == player for row in range(BOARD_ROWS)]):
+            return True
+
+    if all([board[i][i] == player for i in range(BOARD_ROWS)]) or \
+            all([board[i][BOARD_COLS - i - 1] == player for i in range(BOARD_ROWS)]):
+        return True
+
+    return False
+
+def list_available_moves(board):
+    moves = []
+    for row in range(BOARD_ROWS):
+        for col in range(BOARD_COLS):
+            if board[row][col] == EMPTY:
+                moves.append((row, col))
+    return moves
+
+def list_simulate_game(board, player):
+    while True:
+        available_moves = list_available_moves(board)
+        if not available_moves or list_check_winner(board, PLAYER_X) or list_check_winner(board, PLAYER_O):
+            break
+        row, col = random.choice(available_moves)
+        board[row][col] = player
+        player = PLAYER_X if player == PLAYER_O else PLAYER_O
+
+class ListNode:
+    def __init__(self, move=None, parent=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.visits = 0
+        self.wins = 0
+        self.untried_moves = None
+
+    def expand(self, board):
+        self.untried_moves = list_available_moves(board)
+        random.shuffle(self.untried_moves)
+        for move in self.untried_moves:
+            self.children.append(ListNode(move, self))
+
+    def select_child(self):
+        return max(self.children, key=lambda c: c.wins / c.visits + math.sqrt(2 * math.log(self.visits) / c.visits))
+
+def list_mcts(board, player, simulations=1000):
+    root = ListNode()
+    for _ in range(simulations):
+        node = root
+        temp_board = [row[:] for row in board]
+        while not node.untried_moves and node.children:
+            node = node.select_child()
+            row, col = node.move
+            temp_board[row][col] = player
+            player = PLAYER_X if player == PLAYER_O else PLAYER_O
+
+        if node.untried_moves:
+            move = random.choice(node.untried_moves)
+            row, col = move
+            temp_board[row][col] = player
+            player = PLAYER_X if player == PLAYER_O else PLAYER_O
+            node.expand(temp_board)
+            node = node.children[-1]
+
+        list_simulate_game(temp_board, player)
+
+        while node:
+            node.visits += 1
+            if list_check_winner(temp_board, PLAYER_X):
+                node.wins += 1
+            node = node.parent
+
+    if root.children:
+        return max(root.children, key=lambda c: c.wins / c.visits).move
+    return random.choice(list_available_moves(board))
+
+POSITIONS = {
+    "empty": [[EMPTY] * 3 for _ in range(3)],
+    "opening": [[PLAYER_X, EMPTY, EMPTY],
+                [EMPTY, PLAYER_O, EMPTY],
+                [EMPTY, EMPTY, EMPTY]],
+    "midgame": [[PLAYER_X, PLAYER_O, EMPTY],
+                [EMPTY, PLAYER_X, EMPTY],
+                [PLAYER_O, EMPTY, EMPTY]],
+}
+
+def simulations_per_second(search, board, player, simulations, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        search(board, player, simulations)
+    elapsed = time.perf_counter() - start
+    return simulations * repeats / elapsed
+
+def list_playouts(board, player, simulations):
+    for _ in range(simulations):
+        list_simulate_game([row[:] for row in board], player)
+
+def bitboard_playouts(board, player, simulations):
+    board = Board.from_rows(board)
+    for _ in range(simulations):
+        engine.simulate_bits(board.geometry, board.x_bits, board.o_bits, player)
+
+def run_speed_benchmark(simulations=1000, repeats=20):
+    # The playout columns compare the two board representations like for
+    # like. The search columns compare the full MCTS of each, tree included.
+    print(f"{'position':<10}{'list playouts/s':>17}{'bitboard playouts/s':>21}{'speedup':>10}"
+          f"{'list sims/s':>13}{'search sims/s':>15}{'speedup':>10}")
+    for name, board in POSITIONS.items():
+        baseline = simulations_per_second(list_playouts, board, PLAYER_O, simulations, repeats)
+        bitboard = simulations_per_second(bitboard_playouts, board, PLAYER_O, simulations, repeats)
+        list_search = simulations_per_second(list_mcts, board, PLAYER_O, simulations, repeats)
+        search = simulations_per_second(engine.mcts, board, PLAYER_O, simulations, repeats)
+        print(f"{name:<10}{baseline:>17.0f}{bitboard:>21.0f}{bitboard / baseline:>9.1f}x"
+              f"{list_search:>13.0f}{search:>15.0f}{search / list_search:>9.1f}x")
+
+def run_parallel_benchmark(time_budget_ms=200, max_workers=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    board = POSITIONS["empty"]
+    print(f"{'workers':<10}{'simulations':>14}{'sims/s':>12}{'latency ms':>12}")
+    for workers in range(1, max_workers + 1):
+        # Warm the pool up first so process start-up is not billed to the search.
+        engine.search_statistics(board, PLAYER_O, simulations=workers, workers=workers)
+        start = time.perf_counter()
+        total_visits, _ = engine.search_statistics(board, PLAYER_O, time_budget_ms=time_budget_ms, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:<10}{total_visits:>14}{total_visits / elapsed:>12.0f}{elapsed * 1000:>12.1f}")
+    engine.shutdown_executor()
+
+def run_gomoku_benchmark(size=15, win_length=5, time_budget_ms=1000, moves=6):
+    # Plays the opening of a bot-vs-bot game on a large board to show that
+    # every move stays within the time budget.
+    board = Board(size, win_length)
+    player = PLAYER_X
+    print(f"{'move':<10}{'simulations':>14}{'latency ms':>12}")
+    for move_number in range(1, moves + 1):
+        start = time.perf_counter()
+        total_visits, stats = engine.search_statistics(board, player, time_budget_ms=time_budget_ms)
+        row, col = engine.choose_move(board, stats)
+        elapsed = time.perf_counter() - start
+        board.place(row, col, player)
+        player = engine.other_player(player)
+        print(f"{move_number:<10}{total_visits:>14}{elapsed * 1000:>12.1f}")
+
+def play_against_perfect(bot, bot_player, simulations):
+    board = Board(3, 3)
+    player = PLAYER_X
+    while board.winner is None and not board.is_full():
+        if player == bot_player:
+            row, col = bot(board, player, simulations)
+        else:
+            row, col = TicTacToeSolver.random_best_move(board, player)
+        board.place(row, col, player)
+        player = engine.other_player(player)
+    return board.winner
+
+def list_bot(board, player, simulations):
+    rows = [[board.get(row, col) for col in range(BOARD_COLS)] for row in range(BOARD_ROWS)]
+    return list_mcts(rows, player, simulations)
+
+def run_strength_benchmark(budgets=(50, 200, 1000), games=40):
+    # A perfect opponent never loses, so a draw is the best the bot can do.
+    print(f"{'search':<10}{'playouts':>10}{'draws':>8}{'losses':>8}")
+    for name, bot in (("list", list_bot), ("bitboard", engine.mcts)):
+        for simulations in budgets:
+            draws = losses = 0
+            for game in range(games):
+                bot_player = PLAYER_X if game % 2 == 0 else PLAYER_O
+                winner = play_against_perfect(bot, bot_player, simulations)
+                if winner is None:
+                    draws += 1
+                elif winner != bot_player:
+                    losses += 1
+            print(f"{name:<10}{simulations:>10}{draws / games:>8.0%}{losses / games:>8.0%}")
+
+def run_solver_benchmark(lookups=100000):
+    TicTacToeSolver.load_book()
+    board = Board.from_rows(POSITIONS["midgame"])
+    start = time.perf_counter()
+    for _ in range(lookups):
+        TicTacToeSolver.best_move(board, PLAYER_O)
+    elapsed = time.perf_counter() - start
+    print(f"book lookup: {elapsed / lookups * 1e6:.1f} us per move")
+
+if __name__ == "__main__":
+    random.seed(0)
+    run_speed_benchmark()
+    print()
+    run_parallel_benchmark()
+    print()
+    run_gomoku_benchmark()
+    print()
+    run_strength_benchmark()
+    print()
+    run_solver_benchmark()
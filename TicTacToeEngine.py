@@ -0,0 +1,502 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+PLAYER_X = 'X'
+PLAYER_O = 'O'
+EMPTY = ' '
+
+BOARD_SIZE = 3
+WIN_LENGTH = 3
+
+RESULT_GRACE_SECONDS = 0.05
+FALLBACK_SIMULATIONS = 100
+TRANSPOSITION_TABLE_LIMIT = 200000
+SYMMETRY_CELL_LIMIT = 49
+
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+class Geometry:
+    def __init__(self, size, win_length):
+        if not 1 <= win_length <= size:
+            raise ValueError("win_length must be between 1 and the board size")
+        self.size = size
+        self.win_length = win_length
+        self.cell_count = size * size
+        self.cell_bits = tuple(1 << index for index in range(self.cell_count))
+        self.win_masks, self.cell_lines = self.build_lines()
+        self.symmetries = self.build_symmetries()
+        self.symmetry_tables = self.build_symmetry_tables()
+
+    def build_lines(self):
+        # Every run of win_length cells in the four line directions becomes
+        # one mask, and each cell keeps the (at most 4 * win_length) masks
+        # that pass through it so a win can be checked from the last move.
+        win_masks = []
+        cell_lines = [[] for _ in range(self.cell_count)]
+        for row in range(self.size):
+            for col in range(self.size):
+                for d_row, d_col in LINE_DIRECTIONS:
+                    end_row = row + d_row * (self.win_length - 1)
+                    end_col = col + d_col * (self.win_length - 1)
+                    if not (0 <= end_row < self.size and 0 <= end_col < self.size):
+                        continue
+                    cells = [self.move_to_index(row + d_row * i, col + d_col * i) for i in range(self.win_length)]
+                    mask = 0
+                    for index in cells:
+                        mask |= self.cell_bits[index]
+                    win_masks.append(mask)
+                    for index in cells:
+                        cell_lines[index].append(mask)
+        return tuple(win_masks), tuple(tuple(lines) for lines in cell_lines)
+
+    def build_symmetries(self):
+        last = self.size - 1
+        transforms = [lambda row, col: (row, col)]
+        if self.cell_count <= SYMMETRY_CELL_LIMIT:
+            transforms += [lambda row, col: (row, last - col),
+                           lambda row, col: (last - row, col),
+                           lambda row, col: (last - row, last - col),
+                           lambda row, col: (col, last - row),
+                           lambda row, col: (last - col, row),
+                           lambda row, col: (col, row),
+                           lambda row, col: (last - col, last - row)]
+
+        symmetries = []
+        for transform in transforms:
+            permutation = []
+            for index in range(self.cell_count):
+                row, col = transform(*self.index_to_move(index))
+                permutation.append(self.move_to_index(row, col))
+            symmetries.append(tuple(permutation))
+        return tuple(symmetries)
+
+    def build_symmetry_tables(self):
+        # One 256-entry lookup table per byte of a position key (the X stones
+        # above the O stones) and symmetry, so transforming a whole position
+        # costs a handful of lookups instead of a loop over every stone.
+        cell_count = self.cell_count
+        tables = []
+        for permutation in self.symmetries:
+            key_permutation = permutation + tuple(cell_count + index for index in permutation)
+            chunks = []
+            for start in range(0, 2 * cell_count, 8):
+                table = []
+                for byte in range(256):
+                    result = 0
+                    for bit in range(min(8, 2 * cell_count - start)):
+                        if byte >> bit & 1:
+                            result |= 1 << key_permutation[start + bit]
+                    table.append(result)
+                chunks.append(tuple(table))
+            tables.append(tuple(chunks))
+        return tuple(tables)
+
+    def index_to_move(self, index):
+        return divmod(index, self.size)
+
+    def move_to_index(self, row, col):
+        return row * self.size + col
+
+    def has_win(self, bits):
+        for mask in self.win_masks:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def wins_at(self, bits, index):
+        for mask in self.cell_lines[index]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def moves(self, x_bits, o_bits):
+        occupied = x_bits | o_bits
+        cell_bits = self.cell_bits
+        return [index for index in range(self.cell_count) if not occupied & cell_bits[index]]
+
+    def transform_bits(self, bits, chunks):
+        result = 0
+        for table in chunks:
+            result |= table[bits & 255]
+            bits >>= 8
+        return result
+
+    def position_key(self, x_bits, o_bits):
+        # Symmetric positions (rotations and mirrors) map to the same key so
+        # they share one set of statistics. Large boards only use the identity.
+        key = (x_bits << self.cell_count) | o_bits
+        if len(self.symmetries) == 1:
+            return key
+        return min(self.transform_bits(key, chunks) for chunks in self.symmetry_tables)
+
+_geometries = {}
+
+def get_geometry(size=BOARD_SIZE, win_length=WIN_LENGTH):
+    geometry = _geometries.get((size, win_length))
+    if geometry is None:
+        geometry = _geometries[(size, win_length)] = Geometry(size, win_length)
+    return geometry
+
+def other_player(player):
+    return PLAYER_X if player == PLAYER_O else PLAYER_O
+
+class Board:
+    def __init__(self, size=BOARD_SIZE, win_length=WIN_LENGTH):
+        self.geometry = get_geometry(size, win_length)
+        self.size = size
+        self.x_bits = 0
+        self.o_bits = 0
+        self.available = set(range(self.geometry.cell_count))
+        self.winner = None
+
+    @classmethod
+    def from_rows(cls, rows, win_length=None):
+        board = cls(len(rows), win_length or len(rows))
+        for row, cells in enumerate(rows):
+            for col, cell in enumerate(cells):
+                if cell != EMPTY:
+                    board.place(row, col, cell)
+        return board
+
+    def get(self, row, col):
+        bit = self.geometry.cell_bits[self.geometry.move_to_index(row, col)]
+        if self.x_bits & bit:
+            return PLAYER_X
+        if self.o_bits & bit:
+            return PLAYER_O
+        return EMPTY
+
+    def is_empty(self, row, col):
+        return self.geometry.move_to_index(row, col) in self.available
+
+    def place(self, row, col, player):
+        index = self.geometry.move_to_index(row, col)
+        self.available.remove(index)
+        if player == PLAYER_X:
+            self.x_bits |= self.geometry.cell_bits[index]
+            bits = self.x_bits
+        else:
+            self.o_bits |= self.geometry.cell_bits[index]
+            bits = self.o_bits
+        if self.winner is None and self.geometry.wins_at(bits, index):
+            self.winner = player
+        return self.winner == player
+
+    def check_winner(self, player):
+        return self.winner == player
+
+    def is_full(self):
+        return not self.available
+
+    def get_available_moves(self):
+        return [self.geometry.index_to_move(index) for index in self.available]
+
+def as_board(board):
+    if isinstance(board, Board):
+        return board
+    return Board.from_rows(board)
+
+def play_game(x_policy, o_policy, size=BOARD_SIZE, win_length=WIN_LENGTH):
+    # Plays one game between two policies, each a callable taking
+    # (board, player) and returning (row, col). Returns the winner (None for
+    # a draw), the cell index of every move and how long each move took in
+    # nanoseconds.
+    board = Board(size, win_length)
+    policies = {PLAYER_X: x_policy, PLAYER_O: o_policy}
+    player = PLAYER_X
+    moves = []
+    move_times = []
+    while board.winner is None and not board.is_full():
+        start = time.perf_counter_ns()
+        row, col = policies[player](board, player)
+        move_times.append(time.perf_counter_ns() - start)
+        board.place(row, col, player)
+        moves.append(board.geometry.move_to_index(row, col))
+        player = other_player(player)
+    return board.winner, moves, move_times
+
+def simulate_bits(geometry, x_bits, o_bits, player):
+    # Each ply swaps a random free cell to the end of the list and plays
+    # it, which is the same distribution as picking a random free cell each
+    # turn without rebuilding the move list, and random() is a good deal
+    # cheaper than random.shuffle's randrange per cell. Only the lines
+    # through the cell just played are tested for a win.
+    order = geometry.moves(x_bits, o_bits)
+    uniform = random.random
+    cell_bits = geometry.cell_bits
+    cell_lines = geometry.cell_lines
+    x_to_move = player == PLAYER_X
+    for last in range(len(order) - 1, -1, -1):
+        pick = int(uniform() * (last + 1))
+        index = order[pick]
+        order[pick] = order[last]
+        if x_to_move:
+            x_bits |= cell_bits[index]
+            bits = x_bits
+        else:
+            o_bits |= cell_bits[index]
+            bits = o_bits
+        for mask in cell_lines[index]:
+            if bits & mask == mask:
+                return PLAYER_X if x_to_move else PLAYER_O
+        x_to_move = not x_to_move
+    return None
+
+class NodeStats:
+    __slots__ = ('visits', 'wins')
+
+    def __init__(self):
+        self.visits = 0
+        self.wins = 0
+
+class Node:
+    # wins are counted for the player who made the move into this node (a
+    # draw counts as half a win), so a parent picks children from its own
+    # side's point of view.
+    __slots__ = ('move', 'parent', 'x_bits', 'o_bits', 'player', 'winner', 'stats', 'children', 'untried_moves')
+
+    def __init__(self, geometry, x_bits, o_bits, player, stats, move=None, parent=None, winner=None):
+        self.move = move
+        self.parent = parent
+        self.x_bits = x_bits
+        self.o_bits = o_bits
+        self.player = player
+        self.winner = winner
+        self.stats = stats
+        self.children = []
+        if winner is None:
+            self.untried_moves = geometry.moves(x_bits, o_bits)
+        else:
+            self.untried_moves = []
+
+    @property
+    def visits(self):
+        return self.stats.visits
+
+    @property
+    def wins(self):
+        return self.stats.wins
+
+    def is_terminal(self):
+        return not self.untried_moves and not self.children
+
+    def expand(self, tree):
+        # A node only joins the transposition table once the search comes
+        # back to expand it; most nodes are leaves that are visited once,
+        # and working out their symmetries would cost more than the
+        # playout. An untried move is picked at random by swapping it with
+        # the last one, which costs one random number instead of a shuffle.
+        if not self.children:
+            tree.share_stats(self)
+        untried_moves = self.untried_moves
+        index = int(random.random() * len(untried_moves))
+        move = untried_moves[index]
+        untried_moves[index] = untried_moves[-1]
+        untried_moves.pop()
+        geometry = tree.geometry
+        if self.player == PLAYER_X:
+            x_bits, o_bits = self.x_bits | geometry.cell_bits[move], self.o_bits
+            winner = PLAYER_X if geometry.wins_at(x_bits, move) else None
+        else:
+            x_bits, o_bits = self.x_bits, self.o_bits | geometry.cell_bits[move]
+            winner = PLAYER_O if geometry.wins_at(o_bits, move) else None
+        player = other_player(self.player)
+        child = Node(geometry, x_bits, o_bits, player, NodeStats(), move, self, winner)
+        self.children.append(child)
+        return child
+
+    def select_child(self):
+        exploration = 2 * math.log(self.stats.visits)
+        sqrt = math.sqrt
+        selected_child = None
+        best_score = -1.0
+        for child in self.children:
+            stats = child.stats
+            visits = stats.visits
+            score = (stats.wins + sqrt(exploration * visits)) / visits
+            if score > best_score:
+                selected_child = child
+                best_score = score
+        return selected_child
+
+class SearchTree:
+    def __init__(self):
+        self.geometry = None
+        self.table = {}
+        self.root = None
+
+    def share_stats(self, node):
+        # Points the node at the table's stats for its position, adding in
+        # whatever it collected on its own before it was shared.
+        key = (self.geometry.position_key(node.x_bits, node.o_bits) << 1) | (node.player == PLAYER_X)
+        stats = self.table.setdefault(key, node.stats)
+        if stats is not node.stats:
+            stats.visits += node.stats.visits
+            stats.wins += node.stats.wins
+            node.stats = stats
+
+    def find_descendant(self, x_bits, o_bits, player):
+        node = self.root
+        while node is not None:
+            if node.x_bits == x_bits and node.o_bits == o_bits:
+                return node if node.player == player else None
+            for child in node.children:
+                if not child.x_bits & ~x_bits and not child.o_bits & ~o_bits:
+                    node = child
+                    break
+            else:
+                return None
+        return None
+
+    def advance(self, geometry, x_bits, o_bits, player):
+        # Re-root at the position actually reached so the subtree searched on
+        # earlier turns is kept; anything else (a new game, an unexplored
+        # reply) starts a fresh root but still hits the transposition table.
+        if geometry is not self.geometry or len(self.table) > TRANSPOSITION_TABLE_LIMIT:
+            self.geometry = geometry
+            self.table.clear()
+            self.root = None
+        node = self.find_descendant(x_bits, o_bits, player)
+        if node is None:
+            node = Node(geometry, x_bits, o_bits, player, NodeStats())
+            self.share_stats(node)
+        node.parent = None
+        self.root = node
+        return node
+
+def run_search(geometry, x_bits, o_bits, player, simulations=None, deadline=None, tree=None):
+    if tree is None:
+        tree = SearchTree()
+    root = tree.advance(geometry, x_bits, o_bits, player)
+    iterations = 0
+    while simulations is None or iterations < simulations:
+        if deadline is not None and time.time() >= deadline:
+            break
+        iterations += 1
+        node = root
+        while not node.untried_moves and node.children:
+            node = node.select_child()
+
+        if node.untried_moves:
+            node = node.expand(tree)
+
+        if node.winner is not None or node.is_terminal():
+            winner = node.winner
+        else:
+            winner = simulate_bits(geometry, node.x_bits, node.o_bits, node.player)
+
+        while node is not None:
+            stats = node.stats
+            stats.visits += 1
+            if winner is None:
+                stats.wins += 0.5
+            elif winner != node.player:
+                stats.wins += 1
+            node = node.parent
+    return root
+
+def root_statistics(root):
+    # Symmetric replies share one NodeStats through the transposition table.
+    # Each shared entry is reported once, under the lowest move index of the
+    # replies that share it, so the move visits add up to at most the root's
+    # and merging workers does not count the same visits several times.
+    representatives = {}
+    for child in root.children:
+        key = id(child.stats)
+        if key not in representatives or child.move < representatives[key].move:
+            representatives[key] = child
+    return root.visits, {child.move: (child.visits, child.wins) for child in representatives.values()}
+
+_worker_tree = None
+
+def search_worker(size, win_length, x_bits, o_bits, player, simulations, deadline, seed, reuse_tree=False):
+    # Pool processes outlive a single search, so with reuse_tree each worker
+    # keeps its own tree and transposition table between calls.
+    global _worker_tree
+    random.seed(seed)
+    tree = None
+    if reuse_tree:
+        if _worker_tree is None:
+            _worker_tree = SearchTree()
+        tree = _worker_tree
+    geometry = get_geometry(size, win_length)
+    return root_statistics(run_search(geometry, x_bits, o_bits, player, simulations, deadline, tree))
+
+def merge_statistics(results):
+    total_visits = 0
+    merged = {}
+    for visits, stats in results:
+        total_visits += visits
+        for move, (move_visits, move_wins) in stats.items():
+            merged_visits, merged_wins = merged.get(move, (0, 0))
+            merged[move] = (merged_visits + move_visits, merged_wins + move_wins)
+    return total_visits, merged
+
+_executor = None
+_executor_workers = 0
+
+def get_executor(workers):
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        shutdown_executor()
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+def shutdown_executor():
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+    _executor = None
+    _executor_workers = 0
+
+def parallel_search(geometry, x_bits, o_bits, player, simulations, deadline, workers, reuse_tree=False):
+    # Root parallelisation: every worker grows its own tree from the same
+    # position and only the per-root-move statistics are sent back.
+    executor = get_executor(workers)
+    per_worker = None if simulations is None else -(-simulations // workers)
+    futures = [executor.submit(search_worker, geometry.size, geometry.win_length, x_bits, o_bits, player,
+                               per_worker, deadline, random.getrandbits(64), reuse_tree)
+               for _ in range(workers)]
+    timeout = None if deadline is None else max(0.0, deadline - time.time()) + RESULT_GRACE_SECONDS
+    done, not_done = wait(futures, timeout=timeout)
+    # Searches still queued are cancelled; ones already running cannot be,
+    # but they check the same deadline and stop after their current
+    # simulation.
+    for future in not_done:
+        future.cancel()
+    total_visits, stats = merge_statistics(future.result() for future in done)
+    if not total_visits:
+        # No worker got a search in before the deadline, say because the
+        # pool was still starting up; a short search here still gives a
+        # better move than a random one.
+        total_visits, stats = root_statistics(run_search(geometry, x_bits, o_bits, player, FALLBACK_SIMULATIONS))
+    return total_visits, stats
+
+def search_statistics(board, player, simulations=1000, time_budget_ms=None, workers=1, tree=None):
+    board = as_board(board)
+    deadline = None
+    if time_budget_ms is not None:
+        simulations = None
+        deadline = time.time() + time_budget_ms / 1000
+    if workers > 1:
+        return parallel_search(board.geometry, board.x_bits, board.o_bits, player, simulations, deadline, workers,
+                               tree is not None)
+    return root_statistics(run_search(board.geometry, board.x_bits, board.o_bits, player, simulations, deadline, tree))
+
+def choose_move(board, stats):
+    # The most visited root move is the one the search trusts most; the win
+    # rate only breaks ties.
+    visited = [move for move in stats if stats[move][0] > 0]
+    if visited:
+        best_move = max(visited, key=lambda move: (stats[move][0], stats[move][1] / stats[move][0]))
+        return board.geometry.index_to_move(best_move)
+    else:
+        return random.choice(board.get_available_moves())
+
+def mcts(board, player, simulations=1000, time_budget_ms=None, workers=1, tree=None):
+    board = as_board(board)
+    _, stats = search_statistics(board, player, simulations, time_budget_ms, workers, tree)
+    return choose_move(board, stats)
@@ -0,0 +1,175 @@
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import TicTacToeEngine as engine
+import TicTacToeSolver
+from TicTacToeEngine import PLAYER_X, PLAYER_O
+
+# Results file layout (all little-endian):
+#   header: FILE_MAGIC, board size (u8), win length (u8)
+#   then one chunk per finished batch: game count (u32), move count (u32)
+#   followed by the columns of that batch, each stored contiguously:
+#     outcome     game count x i8   (0 draw, 1 X won, 2 O won)
+#     move_count  game count x u16
+#     moves       move count x u16  (cell index, row * size + col)
+#     move_time   move count x u32  (microseconds)
+FILE_MAGIC = b'TTSP\x01'
+FILE_HEADER = struct.Struct('<BB')
+CHUNK_HEADER = struct.Struct('<II')
+COLUMNS = (('outcome', 'b'), ('move_count', 'H'), ('moves', 'H'), ('move_time', 'I'))
+OUTCOME_CODES = {None: 0, PLAYER_X: 1, PLAYER_O: 2}
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_TIME_US = 2 ** 32 - 1
+
+def random_policy(board, player):
+    return board.geometry.index_to_move(random.choice(tuple(board.available)))
+
+def make_policy(name, simulations, time_budget_ms):
+    if name == 'random':
+        return random_policy
+    if name == 'solver':
+        return TicTacToeSolver.random_best_move
+    if name == 'mcts':
+        tree = engine.SearchTree()
+        return lambda board, player: engine.mcts(board, player, simulations, time_budget_ms, tree=tree)
+    raise ValueError(f"unknown policy: {name}")
+
+def play_batch(games, size, win_length, x_name, o_name, simulations, time_budget_ms, seed):
+    random.seed(seed)
+    x_policy = make_policy(x_name, simulations, time_budget_ms)
+    o_policy = make_policy(o_name, simulations, time_budget_ms)
+    outcome = array('b')
+    move_count = array('H')
+    moves = array('H')
+    move_time = array('I')
+    for _ in range(games):
+        winner, game_moves, game_times = engine.play_game(x_policy, o_policy, size, win_length)
+        outcome.append(OUTCOME_CODES[winner])
+        move_count.append(len(game_moves))
+        moves.extend(game_moves)
+        move_time.extend(min(MAX_TIME_US, elapsed // 1000) for elapsed in game_times)
+    return outcome, move_count, moves, move_time
+
+def column_bytes(column):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def write_header(results_file, size, win_length):
+    results_file.write(FILE_MAGIC)
+    results_file.write(FILE_HEADER.pack(size, win_length))
+
+def write_chunk(results_file, columns):
+    outcome, move_count, moves, move_time = columns
+    results_file.write(CHUNK_HEADER.pack(len(outcome), len(moves)))
+    for column in columns:
+        results_file.write(column_bytes(column))
+
+def read_results(path):
+    # Yields one dict of columns per chunk; the header is returned first as
+    # (size, win_length).
+    with open(path, 'rb') as results_file:
+        if results_file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{path} is not a self-play results file")
+        yield FILE_HEADER.unpack(results_file.read(FILE_HEADER.size))
+        while True:
+            header = results_file.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            games, move_total = CHUNK_HEADER.unpack(header)
+            chunk = {}
+            for (name, typecode), length in zip(COLUMNS, (games, games, move_total, move_total)):
+                column = array(typecode)
+                column.frombytes(results_file.read(length * column.itemsize))
+                if sys.byteorder == 'big':
+                    column.byteswap()
+                chunk[name] = column
+            yield chunk
+
+def summarize(path):
+    results = read_results(path)
+    size, win_length = next(results)
+    games = move_total = time_total = 0
+    outcomes = [0, 0, 0]
+    for chunk in results:
+        games += len(chunk['outcome'])
+        move_total += len(chunk['moves'])
+        time_total += sum(chunk['move_time'])
+        for code in chunk['outcome']:
+            outcomes[code] += 1
+    if not games:
+        return f"{path}: no games"
+    return (f"{path}: {games} games on {size}x{size} (k={win_length}), "
+            f"X {outcomes[1] / games:.1%}, O {outcomes[2] / games:.1%}, draw {outcomes[0] / games:.1%}, "
+            f"{move_total / games:.2f} moves/game, {time_total / max(1, move_total):.1f} us/move")
+
+def run_self_play(games, output, workers=None, batch_size=DEFAULT_BATCH_SIZE, size=engine.BOARD_SIZE,
+                  win_length=engine.WIN_LENGTH, x_name='mcts', o_name='mcts', simulations=200,
+                  time_budget_ms=None, seed=None):
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    if 'solver' in (x_name, o_name):
+        if (size, win_length) != (TicTacToeSolver.BOOK_SIZE, TicTacToeSolver.BOOK_SIZE):
+            raise ValueError("the solver policy only plays 3x3 Tic Tac Toe")
+        # Build the book once up front rather than in every worker.
+        TicTacToeSolver.load_book()
+
+    start = time.perf_counter()
+    played = 0
+    remaining = games
+    pending = set()
+    with open(output, 'wb') as results_file, ProcessPoolExecutor(max_workers=workers) as executor:
+        write_header(results_file, size, win_length)
+        # Keep only a couple of batches per worker in flight so memory stays
+        # flat however many games are requested; results are written in the
+        # order they finish.
+        while remaining or pending:
+            while remaining and len(pending) < 2 * workers:
+                batch = min(batch_size, remaining)
+                remaining -= batch
+                pending.add(executor.submit(play_batch, batch, size, win_length, x_name, o_name,
+                                            simulations, time_budget_ms, rng.getrandbits(64)))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                columns = future.result()
+                write_chunk(results_file, columns)
+                played += len(columns[0])
+            results_file.flush()
+            elapsed = time.perf_counter() - start
+            print(f"\r{played}/{games} games, {played / elapsed:.0f} games/s", end='', flush=True)
+    print()
+    return played, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Tic Tac Toe self-play.")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--output', default='selfplay.ttsp')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--size', type=int, default=engine.BOARD_SIZE)
+    parser.add_argument('--win-length', type=int, default=engine.WIN_LENGTH)
+    parser.add_argument('--x', dest='x_name', choices=('mcts', 'solver', 'random'), default='mcts')
+    parser.add_argument('--o', dest='o_name', choices=('mcts', 'solver', 'random'), default='mcts')
+    parser.add_argument('--simulations', type=int, default=200)
+    parser.add_argument('--time-budget-ms', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--summary', action='store_true', help="summarize an existing results file and exit")
+    args = parser.parse_args()
+
+    if args.summary:
+        print(summarize(args.output))
+        return
+    run_self_play(args.games, args.output, args.workers, args.batch_size, args.size, args.win_length,
+                  args.x_name, args.o_name, args.simulations, args.time_budget_ms, args.seed)
+    print(summarize(args.output))
+
+if __name__ == "__main__":
+    main()
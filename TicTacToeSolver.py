@@ -0,0 +1,159 @@
+import os
+import random
+
+from TicTacToeEngine import PLAYER_X, PLAYER_O, as_board, get_geometry, other_player
+
+BOOK_SIZE = 3
+BOOK_CELLS = BOOK_SIZE * BOOK_SIZE
+BOOK_POSITIONS = 3 ** BOOK_CELLS
+BOOK_MAGIC = b'TTTB\x01'
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'TicTacToeBook.bin')
+
+LOSS, DRAW, WIN = 0, 1, 2
+NO_MOVE = 15
+
+POWERS = tuple(3 ** index for index in range(BOOK_CELLS))
+
+# Each book entry is one byte: the game value for the side to move in the
+# high bits and the index of a best move (NO_MOVE when the game is over) in
+# the low four bits. Positions are numbered in base 3 (0 empty, 1 X, 2 O)
+# and the X-to-move half of the table comes first.
+
+_book = None
+
+def position_index(x_bits, o_bits):
+    index = 0
+    for cell in range(BOOK_CELLS):
+        bit = 1 << cell
+        if x_bits & bit:
+            index += POWERS[cell]
+        elif o_bits & bit:
+            index += 2 * POWERS[cell]
+    return index
+
+def entry_offset(x_bits, o_bits, player):
+    return position_index(x_bits, o_bits) + (0 if player == PLAYER_X else BOOK_POSITIONS)
+
+def score_value(score):
+    if score > 0:
+        return WIN
+    if score < 0:
+        return LOSS
+    return DRAW
+
+def build_book():
+    # Negamax over every position with memoisation. A win scores one more
+    # than the number of empty cells left so the solver prefers the fastest
+    # win and the slowest loss; finding a win immediately cuts the search.
+    geometry = get_geometry(BOOK_SIZE, BOOK_SIZE)
+    scores = {}
+
+    def negamax(x_bits, o_bits, player):
+        key = (x_bits, o_bits, player)
+        result = scores.get(key)
+        if result is not None:
+            return result
+        own, opponent = (x_bits, o_bits) if player == PLAYER_X else (o_bits, x_bits)
+        empties = geometry.moves(x_bits, o_bits)
+        if geometry.has_win(opponent):
+            result = (-(len(empties) + 1), NO_MOVE)
+        elif geometry.has_win(own):
+            result = (len(empties) + 1, NO_MOVE)
+        elif not empties:
+            result = (0, NO_MOVE)
+        else:
+            best_score, best_move = None, NO_MOVE
+            for index in empties:
+                bit = geometry.cell_bits[index]
+                if geometry.wins_at(own | bit, index):
+                    best_score, best_move = len(empties), index
+                    break
+                if player == PLAYER_X:
+                    score = -negamax(x_bits | bit, o_bits, PLAYER_O)[0]
+                else:
+                    score = -negamax(x_bits, o_bits | bit, PLAYER_X)[0]
+                if best_score is None or score > best_score:
+                    best_score, best_move = score, index
+            result = (best_score, best_move)
+        scores[key] = result
+        return result
+
+    book = bytearray(2 * BOOK_POSITIONS)
+    for index in range(BOOK_POSITIONS):
+        x_bits = o_bits = 0
+        digits = index
+        for cell in range(BOOK_CELLS):
+            digits, digit = divmod(digits, 3)
+            if digit == 1:
+                x_bits |= 1 << cell
+            elif digit == 2:
+                o_bits |= 1 << cell
+        for offset, player in ((0, PLAYER_X), (BOOK_POSITIONS, PLAYER_O)):
+            score, move = negamax(x_bits, o_bits, player)
+            book[offset + index] = (score_value(score) << 4) | move
+    return bytes(book)
+
+def save_book(book, path=BOOK_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as book_file:
+        book_file.write(BOOK_MAGIC)
+        book_file.write(book)
+    os.replace(temp_path, path)
+
+def read_book(path=BOOK_PATH):
+    try:
+        with open(path, 'rb') as book_file:
+            data = book_file.read()
+    except OSError:
+        return None
+    if not data.startswith(BOOK_MAGIC) or len(data) != len(BOOK_MAGIC) + 2 * BOOK_POSITIONS:
+        return None
+    return data[len(BOOK_MAGIC):]
+
+def load_book(path=BOOK_PATH):
+    # The table is built on first use and cached next to this module; later
+    # runs only read the 39 KB file.
+    global _book
+    if _book is None:
+        book = read_book(path)
+        if book is None:
+            book = build_book()
+            try:
+                save_book(book, path)
+            except OSError:
+                pass
+        _book = book
+    return _book
+
+def can_solve(board):
+    board = as_board(board)
+    return board.size == BOOK_SIZE and board.geometry.win_length == BOOK_SIZE
+
+def lookup(board, player):
+    board = as_board(board)
+    entry = load_book()[entry_offset(board.x_bits, board.o_bits, player)]
+    move = entry & 0x0F
+    return entry >> 4, None if move == NO_MOVE else board.geometry.index_to_move(move)
+
+def best_move(board, player):
+    return lookup(board, player)[1]
+
+def move_values(board, player):
+    # Value of every legal move for the player making it.
+    board = as_board(board)
+    book = load_book()
+    opponent = other_player(player)
+    values = {}
+    for index in board.geometry.moves(board.x_bits, board.o_bits):
+        bit = board.geometry.cell_bits[index]
+        if player == PLAYER_X:
+            x_bits, o_bits = board.x_bits | bit, board.o_bits
+        else:
+            x_bits, o_bits = board.x_bits, board.o_bits | bit
+        values[board.geometry.index_to_move(index)] = WIN - (book[entry_offset(x_bits, o_bits, opponent)] >> 4)
+    return values
+
+def random_best_move(board, player):
+    values = move_values(board, player)
+    best = max(values.values())
+    return random.choice([move for move, value in values.items() if value == best])